@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+from frame_source import ImageFolderSource, open_source
+from hand_detector import HandDetector
+from hand_tracks import extract_handedness
+from hand_tracking import GestureController, load_model
+from spotify_dispatcher import SpotifyCommandDispatcher
+from vision_pipeline import ProcessPipeline
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(dir_path, 'model/landmark_data')
+
+
+# Zbiera czasy wszystkich wywołań każdego etapu
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+    def summary(self):
+        summary = {}
+        for name, samples in self.samples.items():
+            ms = np.array(samples) * 1000
+            summary[name] = {
+                'count': len(ms),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p90_ms': float(np.percentile(ms, 90)),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+        return summary
+
+
+# Zamiast Spotify - zapisuje wywołane komendy
+class RecordingSpotify:
+    def __init__(self):
+        self.calls = []
+
+    def _record(self, name):
+        self.calls.append((name, time.perf_counter()))
+
+    def skip_song(self):
+        self._record('SKIP')
+
+    def previous_song(self):
+        self._record('PREVIOUS')
+
+    def pause_song(self):
+        self._record('PAUSE')
+
+    def resume_song(self):
+        self._record('RESUME')
+
+    def toggle_playback(self):
+        self._record('TOGGLE')
+
+    def change_volume(self, step):
+        self._record('VOLUME_UP' if step > 0 else 'VOLUME_DOWN')
+
+
+# Nagranie (lub kamera) albo zdjęcia z folderów gesture_* z etykietami z nazwy folderu
+def open_benchmark_source(source=None, data_dir=DATA_DIR):
+    if source is not None:
+        return open_source(source), None
+
+    from model.build_dataset import list_images
+
+    images = list_images(data_dir)
+    return ImageFolderSource(paths=[path for path, _ in images]), [label for _, label in images]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=dir_path, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(source=None, backend='numpy', use_roi=True, max_frames=None, warmup=5, debounce=0.3,
+                  max_hands=1, workers=0):
+    timer = StageTimer()
+    model = load_model(backend)
+    spotify = RecordingSpotify()
+    dispatcher = SpotifyCommandDispatcher(spotify, debounce=debounce).start()
+    frames, labels = open_benchmark_source(source)
+    controller = GestureController(model, dispatcher, frames.size, timer=timer)
+    # Zdjęcia z folderu to niezależne ujęcia: bez wycinka z poprzedniego zdjęcia, bez śledzenia MediaPipe
+    # i bez stanu gestów przenoszonego między zdjęciami - inaczej dokładność i czasy ROI nic nie znaczą
+    independent = isinstance(frames, ImageFolderSource)
+    if workers:
+        detector = None
+        pipeline = ProcessPipeline(frames.size, workers, detector_options={'max_num_hands': max_hands})
+    else:
+        detector = HandDetector(max_num_hands=max_hands, model_complexity=0, min_tracking_confidence=0.5,
+                                use_roi=use_roi and not independent, static_image_mode=True if independent else None,
+                                timer=timer)
+        pipeline = None
+    gestures = Counter()
+    frame_labels = {}
+    frame_count = 0
+    hand_frames = 0
+    labelled = 0
+    correct = 0
+    elapsed = 0.0
+
+    def consume(seq, hands, handedness, pts):
+        nonlocal hand_frames, labelled, correct
+        if independent:
+            controller.reset()
+        hand = controller.handle(hands, pts, handedness)
+        label = frame_labels.pop(seq, None)
+        if seq < warmup:
+            return
+        if hand is not None:
+            hand_frames += 1
+            gestures[hand.gesture] += 1
+        if label is not None:
+            labelled += 1
+            correct += hand is not None and hand.gesture == label
+
+    pipeline_stats = None
+    # Procesy i pamięć współdzielona zwalniane także po wyjątku w pętli
+    try:
+        # Czas klatki z nagrania, więc progi czasowe gestów nie zależą od szybkości maszyny
+        for frame, pts in frames:
+            if max_frames is not None and frame_count >= max_frames + warmup:
+                break
+            if labels:
+                frame_labels[frame_count] = labels[frames.last_index]
+            # Pierwsze klatki (inicjalizacja grafu MediaPipe) nie wchodzą do statystyk
+            if frame_count == warmup:
+                timer.samples.clear()
+                elapsed = 0.0
+
+            start = time.perf_counter()
+            if pipeline is None:
+                with timer.stage('frame'):
+                    hands, result = detector.process(frame)
+                    consume(frame_count, hands, extract_handedness(result), pts)
+            else:
+                # Wyniki wracają z opóźnieniem kilku klatek, ale zawsze w kolejności
+                with timer.stage('pipeline submit'):
+                    ready = pipeline.process(frame, pts)
+                for result in ready:
+                    with timer.stage('frame'):
+                        consume(result.seq, result.hands, result.handedness, result.timestamp)
+            elapsed += time.perf_counter() - start
+            frame_count += 1
+
+        if pipeline is not None:
+            start = time.perf_counter()
+            for result in pipeline.flush():
+                consume(result.seq, result.hands, result.handedness, result.timestamp)
+            elapsed += time.perf_counter() - start
+            pipeline_stats = pipeline.stats()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        else:
+            detector.close()
+        frames.release()
+        dispatcher.stop()
+
+    measured = max(frame_count - warmup, 0)
+    return {
+        'source': str(source) if source is not None else DATA_DIR,
+        'frame_size': frames.size,
+        'backend': backend,
+        'roi': use_roi and not workers and not independent,
+        'independent_frames': independent,
+        'max_hands': max_hands,
+        'workers': workers,
+        'revision': git_revision(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'frames': measured,
+        'hand_frames': hand_frames,
+        'throughput_fps': measured / elapsed if elapsed else None,
+        'accuracy': correct / labelled if labelled else None,
+        'gestures': dict(gestures),
+        # Komendy z gestów (czas z nagrania) - niezależne od szybkości maszyny; wykonane wywołania osobno
+        'commands': dict(dispatcher.accepted),
+        'executed_commands': dict(Counter(name for name, _ in spotify.calls)),
+        'gesture_state': controller.gestures.stats(),
+        'dispatcher': dispatcher.stats(),
+        'pipeline': pipeline_stats,
+        'stages': timer.summary(),
+    }
+
+
+def print_report(result):
+    print(f"Frames: {result['frames']}, with hand: {result['hand_frames']}, "
+          f"throughput: {result['throughput_fps'] or 0:.1f} FPS")
+    if result['accuracy'] is not None:
+        print(f"Accuracy: {result['accuracy'] * 100:.2f}%")
+    print(f"Commands: {result['commands'] or 'none'}")
+    if result['pipeline'] is not None:
+        utilization = ', '.join(f"{value:.0f}%" for value in result['pipeline']['worker_utilization_percent'])
+        print(f"Pipeline: {result['workers']} workers ({utilization} busy), "
+              f"main process waiting {result['pipeline']['main_wait_percent']:.0f}%")
+
+    width = max([len(name) for name in result['stages']] + [len('stage')])
+    print(f"  {'stage':<{width}}  {'count':>6}  {'mean':>8}  {'p50':>8}  {'p90':>8}  {'p99':>8}  {'max':>8}  (ms)")
+    for name, stats in result['stages'].items():
+        print(f"  {name:<{width}}  {stats['count']:>6}  {stats['mean_ms']:8.2f}  {stats['p50_ms']:8.2f}  "
+              f"{stats['p90_ms']:8.2f}  {stats['p99_ms']:8.2f}  {stats['max_ms']:8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the gesture pipeline without "
+                                                 "a webcam or Spotify account")
+    parser.add_argument('source', nargs='?', default=None,
+                        help="video file, image folder or camera number (default: the gesture_* image folders)")
+    parser.add_argument('--backend', choices=['numpy', 'keras', 'tflite', 'tflite-int8'], default='numpy')
+    parser.add_argument('--no-roi', action='store_true')
+    parser.add_argument('--max-hands', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="run hand detection in this many processes (frames passed via shared memory)")
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.source, args.backend, not args.no_roi, args.max_frames, args.warmup,
+                           max_hands=args.max_hands, workers=args.workers)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+        print(f"Saved {args.output}")
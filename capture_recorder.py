@@ -0,0 +1,84 @@
+import os
+import queue
+import re
+import threading
+
+import cv2
+
+# Etykieta -> (folder, prefiks pliku), np. OPEN -> gesture_open/o_12.jpg
+LABEL_FOLDERS = {
+    'OPEN': ('gesture_open', 'o'),
+    'CLOSE': ('gesture_close', 'c'),
+    'POINTER': ('gesture_pointer', 'p'),
+}
+
+
+def next_index(folder, prefix):
+    pattern = re.compile(rf'^{prefix}_(\d+)\.jpg$')
+    indexes = [int(match.group(1)) for match in map(pattern.match, os.listdir(folder)) if match]
+    return max(indexes) + 1 if indexes else 0
+
+
+# Zapis zdjęć i punktów w tle - pętla kamery tylko wrzuca klatki do kolejki
+class CaptureRecorder:
+    def __init__(self, data_dir='model/landmark_data', landmarks_writer=None, workers=2, queue_size=32):
+        self.data_dir = data_dir
+        self.landmarks_writer = landmarks_writer
+        self._writer_lock = threading.Lock()
+
+        # Liczniki plików liczone raz przy starcie zamiast os.listdir() przy każdym zdjęciu
+        self.counters = {}
+        for label, (folder, prefix) in LABEL_FOLDERS.items():
+            folder_path = os.path.join(data_dir, folder)
+            os.makedirs(folder_path, exist_ok=True)
+            self.counters[label] = next_index(folder_path, prefix)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.workers = [threading.Thread(target=self._run, name=f'recorder-{idx}', daemon=True)
+                        for idx in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+        self.burst_label = None
+        self.burst_remaining = 0
+        self.saved = 0
+        self.dropped = 0
+
+    def save(self, label, frame, landmarks):
+        folder, prefix = LABEL_FOLDERS[label]
+        path = os.path.join(self.data_dir, folder, f'{prefix}_{self.counters[label]}.jpg')
+        try:
+            # Kopia, bo na klatce jest potem rysowany podgląd
+            self.queue.put_nowait((path, frame.copy(), label, landmarks.copy()))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.counters[label] += 1
+        return True
+
+    def start_burst(self, label, count):
+        self.burst_label = label
+        self.burst_remaining = count
+
+    def feed(self, frame, landmarks):
+        if self.burst_remaining > 0 and self.save(self.burst_label, frame, landmarks):
+            self.burst_remaining -= 1
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            path, frame, label, landmarks = item
+            cv2.imwrite(path, frame)
+            with self._writer_lock:
+                if self.landmarks_writer is not None:
+                    self.landmarks_writer.write(label, landmarks)
+                self.saved += 1
+
+    def close(self):
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        print(f"Saved images: {self.saved}, dropped (queue full): {self.dropped}")
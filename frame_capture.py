@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import namedtuple
+
+# timestamp - czas odczytu (time.perf_counter()), pts - czas klatki względem początku strumienia
+Frame = namedtuple('Frame', ['image', 'timestamp', 'seq', 'pts'], defaults=[None])
+
+
+# Bufor na jedną klatkę - nowa klatka nadpisuje starą, której nikt nie odebrał,
+# chyba że put(block=True): wtedy producent czeka, aż konsument ją odbierze
+class LatestFrameBuffer:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, image, timestamp, pts=None, block=False):
+        with self._condition:
+            if block:
+                self._condition.wait_for(lambda: self._frame is None or self._closed)
+            if self._closed:
+                return
+            if self._frame is not None:
+                self.dropped += 1
+            self._seq += 1
+            self._frame = Frame(image, timestamp, self._seq, pts)
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._closed, timeout)
+            frame = self._frame
+            self._frame = None
+            self._condition.notify_all()
+            return frame
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def produced(self):
+        return self._seq
+
+
+class CaptureThread:
+    def __init__(self, source):
+        self.source = source
+        self.buffer = LatestFrameBuffer()
+        self.finished = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='capture', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # Kamera gubi nieodebrane klatki, nagrania i zdjęcia czekają na konsumenta
+        block = not self.source.realtime
+        while self._running:
+            frame = self.source.read()
+            if frame is None:
+                break
+            image, pts = frame
+            if image is not None:
+                self.buffer.put(image, time.perf_counter(), pts, block=block)
+        self.finished = True
+        self.buffer.close()
+
+    def read(self, timeout=1.0):
+        return self.buffer.get(timeout)
+
+    def stop(self):
+        self._running = False
+        self.buffer.close()
+        if self._thread is not None:
+            self._thread.join()
+        self.source.release()
+
+    @property
+    def dropped(self):
+        return self.buffer.dropped
+
+    def report(self):
+        print(f"Captured frames: {self.buffer.produced}, dropped stale frames: {self.buffer.dropped}")
@@ -0,0 +1,124 @@
+import time
+
+import cv2
+import numpy as np
+
+
+# Ogranicza liczbę przetwarzanych klatek, gdy w kadrze nie ma dłoni.
+# Po idle_after klatkach bez dłoni przechodzi w tryb bezczynności (idle_fps),
+# pierwsza wykryta dłoń przywraca pełne tempo.
+class FrameRateGovernor:
+    def __init__(self, idle_after=30, idle_fps=4.0, motion_threshold=None, motion_size=(32, 18)):
+        self.idle_after = idle_after
+        self.idle_interval = 1.0 / idle_fps
+        self.motion_threshold = motion_threshold
+        self.motion_size = motion_size
+
+        self.idle = False
+        self.frames_without_hand = 0
+        self.last_processed = None
+        self._reference = None
+
+        self.processed = 0
+        self.motion_skipped = 0
+        self.idle_periods = 0
+        self.idle_time = 0.0
+        self.idle_cpu_time = 0.0
+        self.wake_latencies = []
+        self._idle_since = None
+        self._idle_cpu_since = None
+
+    # Uśpienie pętli do następnego przetwarzania w trybie bezczynności (bufor kamery trzyma tylko najnowszą klatkę)
+    def wait(self):
+        if self.idle and self.last_processed is not None:
+            delay = self.last_processed + self.idle_interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def should_process(self, frame):
+        if not self.idle or self.motion_threshold is None:
+            return True
+
+        # Tani test ruchu na pomniejszonej klatce w skali szarości - bez zmian w kadrze MediaPipe nie jest potrzebny
+        small = cv2.cvtColor(cv2.resize(frame, self.motion_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        reference = self._reference
+        self._reference = small
+        if reference is not None and cv2.absdiff(small, reference).mean() < self.motion_threshold:
+            self.motion_skipped += 1
+            self.last_processed = time.perf_counter()
+            return False
+        return True
+
+    def update(self, hand_found, timestamp=None):
+        now = time.perf_counter()
+        if timestamp is None:
+            timestamp = now
+        previous = self.last_processed
+        self.last_processed = now
+        self.processed += 1
+
+        if hand_found:
+            if self.idle:
+                # Górne ograniczenie opóźnienia: dłoń mogła pojawić się tuż po poprzedniej sprawdzonej klatce
+                if previous is not None:
+                    self.wake_latencies.append(timestamp - previous)
+                self._leave_idle(now)
+            self.frames_without_hand = 0
+        else:
+            self.frames_without_hand += 1
+            if not self.idle and self.frames_without_hand >= self.idle_after:
+                self._enter_idle(now)
+
+    def _enter_idle(self, now):
+        self.idle = True
+        self.idle_periods += 1
+        self._idle_since = now
+        self._idle_cpu_since = time.process_time()
+        self._reference = None
+
+    def _leave_idle(self, now):
+        self.idle = False
+        self.idle_time += now - self._idle_since
+        self.idle_cpu_time += time.process_time() - self._idle_cpu_since
+
+    def stats(self):
+        idle_time = self.idle_time
+        idle_cpu_time = self.idle_cpu_time
+        if self.idle:
+            idle_time += time.perf_counter() - self._idle_since
+            idle_cpu_time += time.process_time() - self._idle_cpu_since
+
+        latencies = np.array(self.wake_latencies) * 1000
+        return {
+            'processed': self.processed,
+            'motion_skipped': self.motion_skipped,
+            'idle_periods': self.idle_periods,
+            'idle_time_s': idle_time,
+            'idle_cpu_percent': 100 * idle_cpu_time / idle_time if idle_time else 0.0,
+            'wake_latency_mean_ms': float(latencies.mean()) if len(latencies) else None,
+            'wake_latency_max_ms': float(latencies.max()) if len(latencies) else None,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Governor: processed {stats['processed']} frames, motion-skipped {stats['motion_skipped']}, "
+              f"idle {stats['idle_time_s']:.1f} s in {stats['idle_periods']} periods "
+              f"({stats['idle_cpu_percent']:.1f}% CPU while idle)")
+        if stats['wake_latency_mean_ms'] is not None:
+            print(f"  wake-up latency: mean {stats['wake_latency_mean_ms']:.0f} ms, "
+                  f"max {stats['wake_latency_max_ms']:.0f} ms (limit {self.idle_interval * 1000:.0f} ms)")
+
+
+# Używany gdy ograniczanie tempa jest wyłączone
+class NullGovernor:
+    def wait(self):
+        pass
+
+    def should_process(self, frame):
+        return True
+
+    def update(self, hand_found, timestamp=None):
+        pass
+
+    def report(self):
+        pass
@@ -0,0 +1,192 @@
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+# Źródło klatek: read() zwraca (obraz BGR, pts w sekundach od początku strumienia) albo None na końcu;
+# obraz None oznacza chwilowy brak klatki (kamera).
+# Rozmiar klatki jest ustalany raz przy otwarciu (width, height); realtime=False oznacza, że producent
+# ma czekać na konsumenta zamiast gubić klatki.
+class FrameSource:
+    realtime = True
+
+    def __init__(self):
+        self.width = None
+        self.height = None
+        self.fps = None
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            if frame[0] is not None:
+                yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class WebcamSource(FrameSource):
+    def __init__(self, index=0, width=None, height=None, fps=None):
+        super().__init__()
+        self.cap = cv2.VideoCapture(index)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open camera {index}")
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+
+        # Kamera może nie obsługiwać żądanej rozdzielczości - zapamiętujemy tę, którą faktycznie ustawiła
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        self._opened_at = time.perf_counter()
+
+    def read(self):
+        success, frame = self.cap.read()
+        if not success:
+            if not self.cap.isOpened():
+                return None
+            # Chwilowy brak klatki - czytający spróbuje ponownie
+            time.sleep(0.005)
+            frame = None
+        return frame, time.perf_counter() - self._opened_at
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=False, loop=False):
+        super().__init__()
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._started_at = None
+        self._offset = 0.0
+
+    def read(self):
+        success, frame = self.cap.read()
+        if not success and self.loop:
+            self._offset += self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 + 1 / self.fps
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        if not success:
+            return None
+
+        pts = self._offset + self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if self.realtime:
+            # Odtwarzanie w tempie nagrania, jak z kamery
+            if self._started_at is None:
+                self._started_at = time.perf_counter() - pts
+            delay = self._started_at + pts - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return frame, pts
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(FrameSource):
+    realtime = False
+
+    def __init__(self, folder=None, paths=None, fps=30.0, size=None):
+        super().__init__()
+        if paths is None:
+            paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                     if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.paths = list(paths)
+        self.fps = fps
+        self._index = 0
+        self.last_index = None
+
+        # Rozmiar z pierwszego zdjęcia (albo podany); pozostałe są do niego skalowane
+        if size is None and self.paths:
+            first = cv2.imread(self.paths[0])
+            if first is None:
+                raise ValueError(f"Cannot read image {self.paths[0]}")
+            size = first.shape[1], first.shape[0]
+        if size is not None:
+            self.width, self.height = size
+
+    def read(self):
+        while self._index < len(self.paths):
+            index = self._index
+            self._index += 1
+            frame = cv2.imread(self.paths[index])
+            if frame is None:
+                continue
+            if (frame.shape[1], frame.shape[0]) != self.size:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            self.last_index = index
+            return frame, index / self.fps
+        return None
+
+
+# Klatki z pamięci (lista lub generator tablic) - testy, syntetyczne obciążenia
+class MemorySource(FrameSource):
+    realtime = False
+
+    def __init__(self, frames, fps=30.0, loop=False):
+        super().__init__()
+        self.fps = fps
+        self.loop = loop
+        self._frames = frames if loop else iter(frames)
+        self._iterator = iter(self._frames)
+        self._count = 0
+        first = next(self._iterator, None)
+        self._first = first
+        if first is not None:
+            self.height, self.width = first.shape[:2]
+
+    def read(self):
+        if self._first is not None:
+            frame, self._first = self._first, None
+        else:
+            frame = next(self._iterator, None)
+            if frame is None and self.loop and self._count:
+                self._iterator = iter(self._frames)
+                frame = next(self._iterator, None)
+            if frame is None:
+                return None
+        pts = self._count / self.fps
+        self._count += 1
+        return frame, pts
+
+
+# "0", "1" - numer kamery; katalog - zdjęcia; inaczej plik wideo
+def open_source(spec=0, width=None, height=None):
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or str(spec).isdigit():
+        return WebcamSource(int(spec), width, height)
+    if os.path.isdir(spec):
+        return ImageFolderSource(spec)
+    return VideoFileSource(spec)
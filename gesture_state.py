@@ -0,0 +1,113 @@
+from collections import Counter, deque
+
+TOGGLE_SEQUENCE = ('OPEN', 'CLOSE', 'OPEN')
+
+
+def _per_gesture(value, gesture):
+    return value.get(gesture, 0.0) if isinstance(value, dict) else value
+
+
+# Strumieniowe rozpoznawanie sekwencji OPEN-CLOSE-OPEN z uwzględnieniem czasu.
+# Gest liczy się dopiero, gdy był trzymany min_hold sekund z pewnością >= min_confidence; cała sekwencja musi
+# zmieścić się w max_sequence_duration, a między przełączeniami musi minąć cooldown. Stały koszt na klatkę.
+class GestureStateMachine:
+    def __init__(self, min_hold=0.1, min_confidence=0.7, max_sequence_duration=2.0, cooldown=1.0, mode='PAUSE'):
+        self.min_hold = min_hold
+        self.min_confidence = min_confidence
+        self.max_sequence_duration = max_sequence_duration
+        self.cooldown = cooldown
+        self.mode = mode
+
+        self.count = 0
+        self.candidate = None
+        self.candidate_since = None
+        self.stable = 'NONE'
+        self.sequence = deque(maxlen=len(TOGGLE_SEQUENCE))
+        self.last_toggle = None
+
+        self.emitted = 0
+        self.suppressed = Counter()
+        # Ile przełączeń wysłałaby dawna gesture_recognition() - do porównania zaoszczędzonych wywołań API
+        self.legacy_toggles = 0
+        self._legacy_previous = 'NONE'
+        self._legacy_sequence = deque(maxlen=len(TOGGLE_SEQUENCE))
+
+    def update(self, gesture, confidence, timestamp):
+        self.count += 1
+        self._update_legacy(gesture)
+
+        if confidence < _per_gesture(self.min_confidence, gesture):
+            self.suppressed['low_confidence'] += 1
+            return []
+
+        if gesture != self.candidate:
+            # Poprzedni kandydat zniknął, zanim został potwierdzony - migotanie klasyfikatora
+            if self.candidate is not None and self.candidate != self.stable:
+                self.suppressed['flicker'] += 1
+            self.candidate = gesture
+            self.candidate_since = timestamp
+
+        if gesture == self.stable or timestamp - self.candidate_since < _per_gesture(self.min_hold, gesture):
+            return []
+
+        self.stable = gesture
+        return self._on_stable(gesture, timestamp)
+
+    # Klatka bez dłoni przerywa trzymanie gestu - po powrocie dłoni kandydat liczy czas od nowa
+    def reset_candidate(self):
+        self.candidate = None
+        self.candidate_since = None
+
+    # Zapomina cały stan strumienia (np. między niezależnymi zdjęciami), liczniki zostają
+    def reset(self):
+        self.reset_candidate()
+        self.stable = 'NONE'
+        self.sequence.clear()
+        self._legacy_previous = 'NONE'
+        self._legacy_sequence.clear()
+
+    def _on_stable(self, gesture, timestamp):
+        if gesture not in TOGGLE_SEQUENCE:
+            return []
+        self.sequence.append((gesture, timestamp))
+        if tuple(name for name, _ in self.sequence) != TOGGLE_SEQUENCE:
+            return []
+
+        if timestamp - self.sequence[0][1] > self.max_sequence_duration:
+            self.suppressed['sequence_timeout'] += 1
+            return []
+        self.sequence.clear()
+        if self.last_toggle is not None and timestamp - self.last_toggle < self.cooldown:
+            self.suppressed['cooldown'] += 1
+            return []
+
+        self.last_toggle = timestamp
+        self.mode = 'PLAY' if self.mode == 'PAUSE' else 'PAUSE'
+        self.emitted += 1
+        return ['TOGGLE']
+
+    def _update_legacy(self, gesture):
+        if gesture == self._legacy_previous:
+            return
+        self._legacy_previous = gesture
+        if gesture in ('OPEN', 'CLOSE'):
+            self._legacy_sequence.append(gesture)
+            if tuple(self._legacy_sequence) == TOGGLE_SEQUENCE:
+                self.legacy_toggles += 1
+                self._legacy_sequence.clear()
+
+    def stats(self):
+        return {
+            'observations': self.count,
+            'emitted': self.emitted,
+            'legacy_toggles': self.legacy_toggles,
+            'saved_calls': max(self.legacy_toggles - self.emitted, 0),
+            'suppressed': dict(self.suppressed),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Gesture state machine: {stats['emitted']} toggles sent, {stats['legacy_toggles']} with the old "
+              f"sequence matcher ({stats['saved_calls']} API calls saved)")
+        for reason, count in stats['suppressed'].items():
+            print(f"  suppressed ({reason}): {count}")
@@ -1,9 +1,10 @@
-import speech_recognition as sr
 from music_player_app import MusicPlayer, load_music
+from voice_listener import GoogleRecognizer, VoiceListener, play_command
 
 class GestureVoiceController:
     def __init__(self):
         self.music_player = MusicPlayer()
+        self.voice_listener = None
 
     def play_pause_music_by_gesture(self, gesture):
         if gesture == 'OPEN':
@@ -11,30 +12,17 @@ class GestureVoiceController:
         elif gesture == 'CLOSE':
             self.music_player.play_music('PAUSE')
 
-    def set_music_by_saying_title(self, spotifyApi):
-        recognizer = sr.Recognizer()
+    # Nasłuch w tle - wywołanie wraca od razu, "play song/album ..." trafia do Spotify z wątku rozpoznawania
+    def set_music_by_saying_title(self, spotifyApi, recognizer=None, source=None):
+        if self.voice_listener is None:
+            if recognizer is None:
+                recognizer = GoogleRecognizer()
+            self.voice_listener = VoiceListener(recognizer, source,
+                                                callback=lambda command: play_command(spotifyApi, command)).start()
+        return self.voice_listener
 
-        with sr.Microphone() as source:
-            print("Listening...")
-            audio = recognizer.listen(source)
-
-        try:
-            print("Recognizing...")
-            title = recognizer.recognize_google(audio)
-            title = title.lower()
-
-            title = title.split()
-            print(f"You said: {title}")
-            if title[0] == 'play':
-                if title[1] == 'song':
-                    title = ' '.join(title[2:])
-                    spotifyApi.play_song_name(title)
-                elif title[1] == 'album':
-                    title = ' '.join(title[2:])
-                    spotifyApi.play_album_name(title)
-            else:
-                print("Sorry, I did not understand that.")
-
-        except Exception as e:
-            print("Sorry, I did not understand that.")
-            print(f"Exception: {e}")
+    def stop_listening(self):
+        if self.voice_listener is not None:
+            self.voice_listener.stop()
+            self.voice_listener.report()
+            self.voice_listener = None
@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+
+from landmark_utils import extract_hands, NUM_LANDMARKS
+from startup_profile import NullProfiler
+
+
+# MediaPipe Hands z jawnymi parametrami: po wykryciu dłoni przetwarzany jest tylko wycinek wokół niej,
+# bez dłoni - pomniejszona cała klatka. Punkty zawsze wracają we współrzędnych pełnej klatki.
+class HandDetector:
+    def __init__(self, max_num_hands=1, model_complexity=0, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, use_roi=True, roi_padding=0.3, min_roi_size=128, search_width=320,
+                 edge_margin=0.1, static_image_mode=False, timer=None):
+        import mediapipe as mp
+
+        # Wycinek wokół jednej dłoni zgubiłby pozostałe - przy kilku dłoniach zawsze cała klatka
+        self.use_roi = use_roi and max_num_hands == 1
+        # Śledzenie MediaPipe (bez detektora dłoni w każdej klatce) zakłada ten sam układ obrazu co w poprzedniej
+        # klatce - graf jest resetowany tylko, gdy wycinek się przesuwa albo przechodzi w pomniejszoną klatkę
+        self.static_image_mode = static_image_mode
+        self.hands = mp.solutions.hands.Hands(static_image_mode=static_image_mode,
+                                              max_num_hands=max_num_hands,
+                                              model_complexity=model_complexity,
+                                              min_detection_confidence=min_detection_confidence,
+                                              min_tracking_confidence=min_tracking_confidence)
+        self.roi_padding = roi_padding
+        self.min_roi_size = min_roi_size
+        self.search_width = search_width
+        self.edge_margin = edge_margin
+        # Pomiar czasu poszczególnych etapów (benchmark), domyślnie bez narzutu
+        self.timer = timer if timer is not None else NullProfiler()
+
+        self.roi = None
+        self.roi_size = None
+        self.region = None
+        self.buffer = np.empty((max_num_hands, NUM_LANDMARKS, 2), dtype=np.float32)
+
+        self.roi_frames = 0
+        self.search_frames = 0
+        self.roi_moves = 0
+        self.graph_resets = 0
+
+    def process(self, frame):
+        h, w = frame.shape[:2]
+        with self.timer.stage('crop/resize'):
+            image, offset, size = self._select_region(frame)
+        region = offset, size, image.shape[:2]
+        if not self.static_image_mode and self.region is not None and region != self.region:
+            with self.timer.stage('graph reset'):
+                self.hands.reset()
+            self.graph_resets += 1
+        self.region = region
+        with self.timer.stage('cvtColor'):
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        with self.timer.stage('hand.process'):
+            result = self.hands.process(rgb)
+
+        with self.timer.stage('extract landmarks'):
+            # Współrzędne znormalizowane względem wycinka -> piksele pełnej klatki
+            points = extract_hands(result, size[0], size[1], out=self.buffer)
+            points += np.array(offset, dtype=np.float32)
+
+            if self.use_roi:
+                self._update_roi(points, w, h)
+        return points, result
+
+    def _select_region(self, frame):
+        h, w = frame.shape[:2]
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            self.roi_frames += 1
+            return frame[y0:y1, x0:x1], (x0, y0), (x1 - x0, y1 - y0)
+
+        self.search_frames += 1
+        if self.search_width and w > self.search_width:
+            image = cv2.resize(frame, (self.search_width, round(h * self.search_width / w)),
+                               interpolation=cv2.INTER_AREA)
+            return image, (0, 0), (w, h)
+        return frame, (0, 0), (w, h)
+
+    def _update_roi(self, points, w, h):
+        if not len(points):
+            self.roi = None
+            self.roi_size = None
+            return
+
+        x_min, y_min = points[0].min(axis=0)
+        x_max, y_max = points[0].max(axis=0)
+        hand_size = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.roi_padding)
+
+        # Kwadratowy wycinek o stałym rozmiarze, dopóki dłoń się w nim mieści
+        resized = self.roi_size is None or hand_size > self.roi_size or hand_size < self.roi_size / 2
+        if resized:
+            self.roi_size = int(min(max(hand_size, self.min_roi_size), w, h))
+        size = self.roi_size
+
+        # Histereza: wycinek stoi w miejscu, dopóki dłoń nie zbliży się do jego krawędzi
+        if self.roi is not None and not resized:
+            x0, y0, x1, y1 = self.roi
+            margin = size * self.edge_margin
+            inside_x = (x_min - x0 >= margin or x0 == 0) and (x1 - x_max >= margin or x1 == w)
+            inside_y = (y_min - y0 >= margin or y0 == 0) and (y1 - y_max >= margin or y1 == h)
+            if inside_x and inside_y:
+                return
+
+        center_x = (x_min + x_max) / 2
+        center_y = (y_min + y_max) / 2
+        x0 = int(min(max(center_x - size / 2, 0), w - size))
+        y0 = int(min(max(center_y - size / 2, 0), h - size))
+        self.roi = (x0, y0, x0 + size, y0 + size)
+        self.roi_moves += 1
+
+    def reset(self):
+        self.roi = None
+        self.roi_size = None
+
+    def close(self):
+        self.hands.close()
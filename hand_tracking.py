@@ -1,18 +1,28 @@
 import csv
+import time
 
 import cv2
-import mediapipe as mp
-import tensorflow as tf
 import numpy as np
 
-from gesture_voice_controller import GestureVoiceController
-import tkinter as tk
-from threading import Thread
-import music_player
-import spotify_api as sp
-from dotenv import load_dotenv
 import os
-
+from model.numpy_model import NumpyModel, CLASS_NAMES as MODEL_CLASS_NAMES
+from model.landmark_dataset import LandmarkWriter
+from startup_profile import NullProfiler
+from instrumentation import NullInstrumentation
+from frame_capture import CaptureThread
+from frame_source import open_source
+from capture_recorder import CaptureRecorder
+from hand_detector import HandDetector
+from frame_governor import FrameRateGovernor
+from vision_pipeline import ProcessPipeline
+from gesture_state import GestureStateMachine
+from swipe_detector import SwipeDetector, SWIPE_COMMANDS
+from hand_tracks import Hand, HandTracker, extract_handedness
+from spotify_dispatcher import SpotifyCommandDispatcher
+from landmark_utils import extract_hands, normalize_batch, NUM_LANDMARKS, INDEX_FINGER_TIP
+
+
+CLASS_NAMES = np.array(MODEL_CLASS_NAMES)
 
 gesture_recognition_active = False
 gesture_recognition_paused = False
@@ -24,21 +34,33 @@ def load_labels(filename):
 
 
 def normalization(landmarks):
-    landmarks = np.reshape(landmarks, (1, -1))  # Zamienia tablicę 1x42 na 21x2
-    mean_x = np.mean(landmarks[:, ::2], dtype=float)  # Średnia dla pierwszej kolumny
-    mean_y = np.mean(landmarks[:, 1::2], dtype=float)  # Średnia dla drugiej kolumny
-
-    normalized_landmarks = np.zeros_like(landmarks, dtype=float)
+    return normalize_batch(landmarks)
 
-    normalized_landmarks[:, ::2] = landmarks[:, ::2] - mean_x
-    normalized_landmarks[:, 1::2] = landmarks[:, 1::2] - mean_y
 
-    return np.reshape(normalized_landmarks, (1, -1))
+def load_model(backend='numpy'):
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    keras_path = os.path.join(dir_path, 'model/model_save/hand_tracking_model.keras')
+
+    if backend == 'keras':
+        import tensorflow as tf
+        return tf.keras.models.load_model(keras_path)
+    elif backend == 'numpy':
+        npz_path = os.path.join(dir_path, 'model/model_save/hand_tracking_model.npz')
+        return NumpyModel.load(npz_path, keras_path)
+    elif backend in ('tflite', 'tflite-int8'):
+        from model.tflite_model import TFLiteModel, TFLITE_MODEL_PATH, TFLITE_INT8_MODEL_PATH
+        return TFLiteModel.load(TFLITE_MODEL_PATH if backend == 'tflite' else TFLITE_INT8_MODEL_PATH)
+    else:
+        raise ValueError(f"Unknown model backend: {backend}")
 
 
 def predict(landmarks, model):
     landmarks = normalization(landmarks)
     prediction = model.predict(landmarks, verbose=0)
+    return gesture_name(prediction)
+
+
+def gesture_name(prediction):
     hand_state = np.argmax(prediction)
     if hand_state == 0:
         return "CLOSE"
@@ -50,10 +72,10 @@ def predict(landmarks, model):
         return "NONE"
 
 
-def hand_tracker(width: int, height: int):
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+def hand_tracker(width: int, height: int, source=0):
+    import mediapipe as mp
+
+    capture = CaptureThread(open_source(source, width, height)).start()
 
     mp_drawing = mp.solutions.drawing_utils
     mp_hands = mp.solutions.hands
@@ -61,25 +83,24 @@ def hand_tracker(width: int, height: int):
 
     labels = load_labels('model/landmark_data/landmark_classifier_label.csv')
     current_label = None
+    hands_buffer = np.empty((2, NUM_LANDMARKS, 2), dtype=np.float32)
 
-    with open('model/landmark_data/landmarks_data.csv', mode='a', newline='') as landmark_file:
-        landmarks_writer = csv.writer(landmark_file)
-
+    with LandmarkWriter('model/landmark_data/landmarks_data.lmk') as landmarks_writer:
         while True:
-            success, frame = cap.read()
-            if success:
+            captured = capture.read()
+            if captured is None and capture.finished:
+                break
+            if captured is not None:
+                frame = captured.image
                 RGB_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 result = hand.process(RGB_frame)
 
                 drawing_spec = mp_drawing.DrawingSpec(color=(189, 183, 107), thickness=2, circle_radius=1)
                 if result.multi_hand_landmarks:
-                    for hand_landmarks in result.multi_hand_landmarks:
-                        landmarks = []
-                        for idx, lm in enumerate(hand_landmarks.landmark):
-                            h, w, c = frame.shape
-                            cx, cy = int(lm.x * w), int(lm.y * h)
-                            landmarks.extend([cx, cy])
-
+                    hands = extract_hands(result, frame.shape[1], frame.shape[0], out=hands_buffer)
+                    for hand_landmarks, points in zip(result.multi_hand_landmarks, hands):
+                        landmarks = points
+                        for idx, (cx, cy) in enumerate(points.astype(int).tolist()):
                             cv2.putText(frame, f"{idx}: ({cx, cy})", (cx, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
                                         (255, 255, 255), 1, cv2.LINE_AA)
 
@@ -89,7 +110,7 @@ def hand_tracker(width: int, height: int):
                         key = cv2.waitKey(1)
                         if key == ord('c'):
                             if current_label is not None:
-                                landmarks_writer.writerow([current_label] + landmarks)
+                                landmarks_writer.write(current_label, landmarks)
                             else:
                                 print("Nie wybrano etykiety.")
                 if current_label is not None:
@@ -111,14 +132,15 @@ def hand_tracker(width: int, height: int):
                 if key == ord('q'):
                     break
 
-    cap.release()
+    capture.stop()
+    capture.report()
     cv2.destroyAllWindows()
 
 
-def hand_tracker_img(width: int, height: int):
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+def hand_tracker_img(width: int, height: int, burst_size=10, source=0):
+    import mediapipe as mp
+
+    capture = CaptureThread(open_source(source, width, height)).start()
 
     mp_drawing = mp.solutions.drawing_utils
     mp_hands = mp.solutions.hands
@@ -126,41 +148,33 @@ def hand_tracker_img(width: int, height: int):
 
     labels = load_labels('model/landmark_data/landmark_classifier_label.csv')
     current_label = None
+    hands_buffer = np.empty((2, NUM_LANDMARKS, 2), dtype=np.float32)
 
-    with open('model/landmark_data/landmarks_data.csv', mode='a', newline='') as landmark_file:
-        landmarks_writer = csv.writer(landmark_file)
-
+    with LandmarkWriter('model/landmark_data/landmarks_data.lmk') as landmarks_writer:
+        recorder = CaptureRecorder('model/landmark_data', landmarks_writer)
         while True:
-            success, frame = cap.read()
-            if success:
+            captured = capture.read()
+            if captured is None and capture.finished:
+                break
+            if captured is not None:
+                frame = captured.image
                 RGB_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 result = hand.process(RGB_frame)
 
                 drawing_spec = mp_drawing.DrawingSpec(color=(189, 183, 107), thickness=2, circle_radius=1)
                 if result.multi_hand_landmarks:
-                    for hand_landmarks in result.multi_hand_landmarks:
-                        landmarks = []
-                        for idx, lm in enumerate(hand_landmarks.landmark):
-                            h, w, c = frame.shape
-                            cx, cy = int(lm.x * w), int(lm.y * h)
-                            landmarks.extend([cx, cy])
-
-                        key = cv2.waitKey(1)
-                        if key == ord('c'):
-                            if current_label is not None:
-                                if current_label == 'OPEN':  # open
-                                    image_name = f"o_{len(os.listdir('model/landmark_data/gesture_open'))}.jpg"
-                                    cv2.imwrite(os.path.join('model/landmark_data/gesture_open', image_name), frame)
-                                elif current_label == 'CLOSE':  # close
-                                    image_name = f"c_{len(os.listdir('model/landmark_data/gesture_close'))}.jpg"
-                                    cv2.imwrite(os.path.join('model/landmark_data/gesture_close', image_name), frame)
-                                elif current_label == 'POINTER':  # pointer
-                                    image_name = f"p_{len(os.listdir('model/landmark_data/gesture_pointer'))}.jpg"
-                                    cv2.imwrite(os.path.join('model/landmark_data/gesture_pointer', image_name), frame)
-
-                                landmarks_writer.writerow([current_label] + landmarks)
-                            else:
-                                print("Nie wybrano etykiety.")
+                    hands = extract_hands(result, frame.shape[1], frame.shape[0], out=hands_buffer)
+                    # Jedno zdjęcie na klatkę - przy kilku dłoniach zapisywane są punkty największej z nich
+                    landmarks = hands[np.argmax(np.ptp(hands, axis=1).max(axis=1))]
+                    key = cv2.waitKey(1)
+                    if key == ord('c') or key == ord('b'):
+                        if current_label is None:
+                            print("Nie wybrano etykiety.")
+                        elif key == ord('c'):
+                            recorder.save(current_label, frame, landmarks)
+                        else:
+                            recorder.start_burst(current_label, burst_size)
+                    recorder.feed(frame, landmarks)
                 if current_label is not None:
                     cv2.putText(frame, f"Label: {current_label}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1,
                                 (255, 255, 255), 2, cv2.LINE_AA)
@@ -179,94 +193,212 @@ def hand_tracker_img(width: int, height: int):
 
                 if key == ord('q'):
                     break
+        recorder.close()
 
-    cap.release()
+    capture.stop()
+    capture.report()
     cv2.destroyAllWindows()
 
 
-def hand_recognition(width: int, height: int):
-    import os
-
+# Stan rozpoznawania gestów jednej sesji: klasyfikacja dłoni, sekwencja OPEN-CLOSE-OPEN i przesunięcia wskaźnika.
+# Wspólny dla hand_recognition() i benchmarku, żeby mierzony był ten sam kod.
+class GestureController:
+    def __init__(self, model, dispatcher, frame_size, timer=None, gestures=None, swipes=None, tracker=None):
+        self.model = model
+        self.dispatcher = dispatcher
+        self.frame_size = np.array(frame_size, dtype=np.float32)
+        self.timer = timer if timer is not None else NullProfiler()
+        self.gestures = gestures if gestures is not None else GestureStateMachine()
+        self.swipes = swipes if swipes is not None else SwipeDetector()
+        self.tracker = tracker if tracker is not None else HandTracker(frame_size)
+        self.hands = []
+        self.controller_id = None
+
+    # Wszystkie dłonie (N, 21, 2) naraz: jedna normalizacja i jedno wywołanie modelu
+    def classify(self, hands):
+        with self.timer.stage('normalization'):
+            features = normalization(hands)
+        with self.timer.stage('predict'):
+            prediction = self.model.predict(features, verbose=0)
+        return CLASS_NAMES[np.argmax(prediction, axis=1)], np.max(prediction, axis=1)
+
+    def update(self, predict_gesture, confidence, landmarks, timestamp):
+        commands = self.gestures.update(predict_gesture, confidence, timestamp)
+
+        if predict_gesture == "POINTER":
+            cx, cy = landmarks[INDEX_FINGER_TIP] / self.frame_size
+            swipe = self.swipes.update(cx, cy, timestamp)
+            if swipe is not None:
+                print(f"Mode: SWIPE {swipe}")
+                commands.append(SWIPE_COMMANDS[swipe])
+        else:
+            self.swipes.reset()
+        return commands
+
+    def handle(self, hands, timestamp=None, handedness=None):
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        hands = np.asarray(hands, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 2)
+        if not len(hands):
+            self.hands = []
+            self.gestures.reset_candidate()
+            return None
+
+        gestures, confidences = self.classify(hands)
+        with self.timer.stage('tracking'):
+            ids = self.tracker.assign(hands, timestamp)
+            controller = self.tracker.select_controller(ids, handedness, hands)
+        self.hands = [Hand(int(track_id), handedness[idx] if handedness else None, hands[idx], str(gestures[idx]),
+                           float(confidences[idx])) for idx, track_id in enumerate(ids)]
+        hand = self.hands[controller]
+
+        # Zmiana dłoni sterującej - trajektoria poprzedniej dłoni nie może dać przesunięcia
+        if hand.track_id != self.controller_id:
+            self.swipes.reset()
+            self.controller_id = hand.track_id
+
+        with self.timer.stage('gesture_recognition'):
+            commands = self.update(hand.gesture, hand.confidence, hand.landmarks, timestamp)
+        with self.timer.stage('dispatch'):
+            for command in commands:
+                self.dispatcher.submit(command, timestamp)
+        return hand
+
+    # Następna klatka nie jest ciągiem dalszym poprzedniej - bez śladów, sekwencji i trajektorii
+    def reset(self):
+        self.tracker.reset()
+        self.swipes.reset()
+        self.gestures.reset()
+        self.hands = []
+        self.controller_id = None
+
+    @property
+    def mode(self):
+        return self.gestures.mode
+
+
+def hand_recognition(width: int, height: int, backend='numpy', profiler=None, use_roi=True, governor=None,
+                     instrumentation=None, overlay=False, source=0, max_hands=1, controller_hand=None,
+                     workers=0):
     global gesture_recognition_active
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    model_path = os.path.join(dir_path, 'model/model_save/hand_tracking_model.keras')
 
-    model = tf.keras.models.load_model(model_path)
+    if profiler is None:
+        profiler = NullProfiler()
+    if governor is None:
+        governor = FrameRateGovernor()
+    if instrumentation is None:
+        instrumentation = NullInstrumentation()
 
-    previous_mode = 'PAUSE'
-    previous_gesture = 'NONE'
-    gesture_sequence = []
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-    mp_hands = mp.solutions.hands
-    hand = mp_hands.Hands()
+    with profiler.stage(f'model load ({backend})'):
+        model = load_model(backend)
+
+    with profiler.stage('import mediapipe'):
+        import mediapipe
+    detector = None
+    if not workers:
+        with profiler.stage('mp_hands.Hands()'):
+            detector = HandDetector(max_num_hands=max_hands, model_complexity=0, min_tracking_confidence=0.5,
+                                    use_roi=use_roi, timer=instrumentation)
+
+    with profiler.stage('import spotify_api'):
+        import spotify_api as sp
+        from dotenv import load_dotenv
 
     load_dotenv()
 
     client_id = os.getenv("CLIENT_ID")
     client_secret = os.getenv("CLIENT_SECRET")
     redirect_uri = os.getenv("REDIRECT_URI")
-    prev_cx = None
-    swipe_threshold = 50
-
-    spotifyApi = sp.SpotifyAPI(client_id, client_secret, redirect_uri)
-
-    while True:
-        success, frame = cap.read()
-        if success and gesture_recognition_active:
-            if gesture_recognition_paused:
-                continue
-            RGB_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = hand.process(RGB_frame)
-
-            if result.multi_hand_landmarks:
-                hand_landmarks = result.multi_hand_landmarks[0]
-                landmarks = []
-                for idx, lm in enumerate(hand_landmarks.landmark):
-                    h, w, c = frame.shape
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    landmarks.extend([cx, cy])
-
-                predict_gesture = predict(landmarks, model)
-                if predict_gesture != previous_gesture:
-                    current_mode = gesture_recognition(gesture_sequence, predict_gesture, previous_mode)
-                    if current_mode != previous_mode:
-                        if current_mode == 'PLAY' or current_mode == 'PAUSE':
-                            current_song = spotifyApi.get_current_song()
-                            if current_song is not None and current_song['is_playing'] is True:
-                                spotifyApi.pause_song()
-                            elif current_song is not None and current_song['is_playing'] is False:
-                                spotifyApi.resume_song()
-                        previous_mode = current_mode
-                    previous_gesture = predict_gesture
-
-                cv2.putText(frame, predict_gesture, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1,
-                            (255, 255, 255), 2, cv2.LINE_AA)
-
-                if predict_gesture == "POINTER":
-                    index_tip = hand_landmarks.landmark[8]
-                    h, w, c = frame.shape
-                    cx, cy = int(index_tip.x * w), int(index_tip.y * h)
-                    cv2.circle(frame, (cx, cy), radius=5, color=(0, 0, 255), thickness=-1)
-
-                    if prev_cx is not None:
-                        if cx - prev_cx > swipe_threshold:
-                            print("Mode: SWIPE RIGHT")
-                            spotifyApi.skip_song()
-                        elif prev_cx - cx > swipe_threshold:
-                            print("Mode: SWIPE LEFT")
-                            spotifyApi.previous_song()
-                    prev_cx = cx
-                if predict_gesture != "POINTER":
-                    prev_cx = None
-
-            # cv2.imshow("Music.", frame)
-            key = cv2.waitKey(1)
-            if key == ord('q'):
+
+    with profiler.stage('SpotifyAPI init'):
+        spotifyApi = sp.SpotifyAPI(client_id, client_secret, redirect_uri)
+    spotifyApi.start_playback_refresh()
+    dispatcher = SpotifyCommandDispatcher(spotifyApi, timer=instrumentation).start()
+
+    with profiler.stage('camera open'):
+        capture = CaptureThread(open_source(source, width, height)).start()
+    with profiler.stage('first frame'):
+        capture.read()
+    tracker = HandTracker(capture.source.size, preferred_handedness=controller_hand)
+    controller = GestureController(model, dispatcher, capture.source.size, timer=instrumentation, tracker=tracker)
+    pipeline = None
+    if workers:
+        # MediaPipe w osobnych procesach; klatki przez pamięć współdzieloną, wyniki w kolejności klatek
+        with profiler.stage(f'detector processes ({workers})'):
+            pipeline = ProcessPipeline(capture.source.size, workers,
+                                       detector_options={'max_num_hands': max_hands})
+    profiler.report()
+
+    def show(frame, hands, handedness, timestamp):
+        governor.update(len(hands) > 0, timestamp)
+
+        # Wszystkie dłonie klasyfikowane razem, gesty steruje tylko jedna (stały identyfikator śladu);
+        # klatka bez dłoni też trafia do kontrolera, żeby przerwać trzymanie gestu
+        hand = controller.handle(hands, timestamp, handedness)
+        if hand is not None:
+            predict_gesture = hand.gesture
+
+            cv2.putText(frame, predict_gesture, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                        (255, 255, 255), 2, cv2.LINE_AA)
+
+            if predict_gesture == "POINTER":
+                cx, cy = hand.landmarks[INDEX_FINGER_TIP]
+                cv2.circle(frame, (int(cx), int(cy)), radius=5, color=(0, 0, 255), thickness=-1)
+
+        if overlay:
+            instrumentation.draw_overlay(frame)
+            cv2.imshow("Music.", frame)
+
+    # Procesy detekcji i pamięć współdzielona zwalniane także po wyjątku w pętli
+    try:
+        while True:
+            governor.wait()
+            with instrumentation.stage('camera wait'):
+                captured = capture.read()
+            if captured is None and capture.finished:
                 break
+            if captured is not None and gesture_recognition_active:
+                if gesture_recognition_paused:
+                    continue
+                frame = captured.image
+                instrumentation.record('frame age', time.perf_counter() - captured.timestamp)
+                instrumentation.frame()
+                if not governor.should_process(frame):
+                    continue
+                if pipeline is None:
+                    # Punkty we współrzędnych pełnej klatki, niezależnie od wycinka przetwarzanego przez MediaPipe
+                    hands, result = detector.process(frame)
+                    show(frame, hands, extract_handedness(result), captured.timestamp)
+                else:
+                    with instrumentation.stage('pipeline submit'):
+                        ready = pipeline.process(frame, captured.timestamp)
+                    for processed in ready:
+                        show(processed.frame, processed.hands, processed.handedness, processed.timestamp)
+                # cv2.imshow("Music.", frame)
+                key = cv2.waitKey(1)
+                if key == ord('q'):
+                    break
 
-    cap.release()
+        if pipeline is not None:
+            for processed in pipeline.flush():
+                show(processed.frame, processed.hands, processed.handedness, processed.timestamp)
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+
+    capture.stop()
+    capture.report()
+    if pipeline is None:
+        print(f"Hand detector: ROI frames {detector.roi_frames} (crop moved {detector.roi_moves} times), "
+              f"full-frame search frames {detector.search_frames}, MediaPipe graph resets {detector.graph_resets}")
+        detector.close()
+    else:
+        pipeline.report()
+    governor.report()
+    controller.gestures.report()
+    dispatcher.stop()
+    dispatcher.report()
+    spotifyApi.stop_playback_refresh()
     cv2.destroyAllWindows()
 
 
@@ -275,15 +407,8 @@ def extract_landmarks(image, hand):
 
     result = hand.process(image_rgb)
 
-    landmarks = []
-
-    if result.multi_hand_landmarks:
-        for hand_landmarks in result.multi_hand_landmarks:
-            for lm in hand_landmarks.landmark:
-                h, w, _ = image.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                landmarks.extend([cx, cy])
-    return np.array(landmarks)
+    h, w, _ = image.shape
+    return extract_hands(result, w, h).ravel()
 
 
 def gesture_recognition(gesture_sequence, current_gesture, current_mode):
@@ -0,0 +1,85 @@
+from collections import namedtuple
+
+import numpy as np
+
+Hand = namedtuple('Hand', ['track_id', 'handedness', 'landmarks', 'gesture', 'confidence'])
+
+
+def extract_handedness(result):
+    return [handedness.classification[0].label for handedness in (result.multi_handedness or [])]
+
+
+# Stałe identyfikatory dłoni między klatkami (najbliższy środek dłoni) i wybór jednej dłoni sterującej
+class HandTracker:
+    def __init__(self, frame_size, max_distance=0.2, max_age=0.5, preferred_handedness=None):
+        self.frame_size = np.array(frame_size, dtype=np.float32)
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.preferred_handedness = preferred_handedness
+
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.centroids = np.zeros((0, 2), dtype=np.float32)
+        self.last_seen = np.zeros(0, dtype=np.float64)
+        self.next_id = 0
+        self.controller_id = None
+
+    def reset(self):
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.centroids = np.zeros((0, 2), dtype=np.float32)
+        self.last_seen = np.zeros(0, dtype=np.float64)
+        self.controller_id = None
+
+    def assign(self, hands, timestamp):
+        centroids = hands.mean(axis=1) / self.frame_size
+
+        alive = timestamp - self.last_seen <= self.max_age
+        self.track_ids = self.track_ids[alive]
+        self.centroids = self.centroids[alive]
+        self.last_seen = self.last_seen[alive]
+
+        ids = np.full(len(hands), -1, dtype=np.int64)
+        if len(self.track_ids):
+            # Macierz odległości (dłonie x ślady); przypisanie zachłanne od najbliższych par
+            distances = np.linalg.norm(centroids[:, None, :] - self.centroids[None, :, :], axis=2)
+            used_tracks = set()
+            for flat in np.argsort(distances, axis=None):
+                hand, track = divmod(int(flat), distances.shape[1])
+                if distances[hand, track] > self.max_distance:
+                    break
+                if ids[hand] == -1 and track not in used_tracks:
+                    ids[hand] = self.track_ids[track]
+                    used_tracks.add(track)
+
+        for hand in np.flatnonzero(ids == -1):
+            ids[hand] = self.next_id
+            self.next_id += 1
+
+        # Aktualizacja śladów: dopasowane dostają nową pozycję, nowe są dopisywane
+        positions = {track_id: idx for idx, track_id in enumerate(self.track_ids.tolist())}
+        for hand, track_id in enumerate(ids.tolist()):
+            idx = positions.get(track_id)
+            if idx is None:
+                self.track_ids = np.append(self.track_ids, track_id)
+                self.centroids = np.vstack([self.centroids, centroids[hand:hand + 1]])
+                self.last_seen = np.append(self.last_seen, timestamp)
+            else:
+                self.centroids[idx] = centroids[hand]
+                self.last_seen[idx] = timestamp
+        return ids
+
+    # Dłoń sterująca zostaje, dopóki jest w kadrze; inaczej preferowana ręka, a z nich największa (najbliżej kamery)
+    def select_controller(self, ids, handedness, hands):
+        if self.controller_id is not None:
+            matches = np.flatnonzero(ids == self.controller_id)
+            if len(matches):
+                return int(matches[0])
+
+        candidates = np.arange(len(ids))
+        if self.preferred_handedness is not None and handedness:
+            preferred = [idx for idx in candidates if handedness[idx] == self.preferred_handedness]
+            if preferred:
+                candidates = np.array(preferred)
+        extent = hands[candidates].max(axis=1) - hands[candidates].min(axis=1)
+        choice = int(candidates[np.argmax(extent[:, 0] * extent[:, 1])])
+        self.controller_id = int(ids[choice])
+        return choice
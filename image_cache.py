@@ -0,0 +1,139 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+from spotify_cache import directory_size, evict_oldest
+
+DEFAULT_COVER_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'music-computer-vision', 'covers')
+
+
+# Okładki na dysku (oryginał + miniatury) i zdekodowane miniatury w pamięci, pobierane w tle
+class CoverCache:
+    def __init__(self, cache_dir=DEFAULT_COVER_DIR, memory_size=64, max_disk_bytes=200 * 1024 * 1024, workers=2):
+        self.cache_dir = cache_dir
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+
+        # Wspólna sesja keep-alive dla wszystkich pobrań
+        self.session = requests.Session()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='covers')
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.downloads = 0
+        self.write_errors = 0
+
+    def _path(self, url, size=None):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        if size is None:
+            return os.path.join(self.cache_dir, f'{name}.jpg')
+        return os.path.join(self.cache_dir, f'{name}_{size}.jpg')
+
+    # size=None - okładka w oryginalnym rozmiarze (tak wyświetlają ją kafelki), inaczej miniatura size x size
+    def prefetch(self, url, size=None):
+        return self.pool.submit(self.load, url, size)
+
+    def load(self, url, size=None):
+        key = (url, size)
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return image
+
+        path = self._path(url, size)
+        if os.path.exists(path):
+            image = Image.open(path)
+            image.load()
+            with self._lock:
+                self.disk_hits += 1
+        elif size is None:
+            image = self._open_original(url)
+        else:
+            image = self._make_thumbnail(url, size, path)
+
+        with self._lock:
+            self._memory[key] = image
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+        return image
+
+    # Bajty oryginału z dysku albo z sieci - obraz powstaje z pamięci, nawet gdy zapis na dysk się nie uda
+    def _download(self, url):
+        original_path = self._path(url)
+        try:
+            with open(original_path, 'rb') as file:
+                return file.read()
+        except OSError:
+            pass
+        response = self.session.get(url, timeout=10)
+        response.raise_for_status()
+        with self._lock:
+            self.downloads += 1
+        self._write(original_path, response.content)
+        return response.content
+
+    def _open_original(self, url):
+        image = Image.open(io.BytesIO(self._download(url)))
+        image.load()
+        return image
+
+    def _make_thumbnail(self, url, size, thumb_path):
+        image = Image.open(io.BytesIO(self._download(url)))
+        # JPEG dekodowany od razu w zmniejszonej skali, bez pełnego 640px
+        image.draft('RGB', (size, size))
+        image = image.convert('RGB')
+        image.thumbnail((size, size))
+
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        self._write(thumb_path, buffer.getvalue())
+        return image
+
+    def _write(self, path, data):
+        # Zapis przez plik tymczasowy, żeby równoległe load() nie odczytało połowy pliku
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Dysk pełny / tylko do odczytu - okładka i tak trafia do pamięci
+            with self._lock:
+                self.write_errors += 1
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if self.write_errors == 1:
+                print(f"Cover cache: cannot write to {self.cache_dir}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = directory_size(self.cache_dir)
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_bytes = evict_oldest(self.cache_dir, self.max_disk_bytes)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'downloads': self.downloads,
+            'write_errors': self.write_errors,
+            'memory_items': len(self._memory),
+        }
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from startup_profile import NullProfiler
+
+
+# Ostatnie `size` pomiarów w buforze cyklicznym - stała pamięć niezależnie od czasu działania
+class RollingHistogram:
+    def __init__(self, size=256):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def snapshot(self):
+        return self.values[:min(self.count, len(self.values))].copy()
+
+
+# Czasy etapów pętli rozpoznawania (kamera, MediaPipe, model, Spotify) i FPS
+class Instrumentation:
+    def __init__(self, window=256):
+        self.window = window
+        self.histograms = {}
+        self.frame_times = RollingHistogram(window)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def frame(self):
+        with self._lock:
+            self.frame_times.add(time.perf_counter())
+
+    def fps(self):
+        with self._lock:
+            times = self.frame_times.snapshot()
+        if len(times) < 2:
+            return 0.0
+        return (len(times) - 1) / (times.max() - times.min())
+
+    def summary(self):
+        with self._lock:
+            snapshots = {name: (histogram.count, histogram.snapshot()) for name, histogram in self.histograms.items()}
+
+        stages = {}
+        for name, (count, values) in snapshots.items():
+            ms = values * 1000
+            stages[name] = {
+                'count': count,
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'max_ms': float(ms.max()),
+            }
+        return {'time': time.time(), 'fps': self.fps(), 'stages': stages}
+
+    def draw_overlay(self, frame, stages=None, origin=(10, 60)):
+        summary = self.summary()
+        lines = [f"FPS: {summary['fps']:.1f}"]
+        for name, stats in summary['stages'].items():
+            if stages is None or name in stages:
+                lines.append(f"{name}: {stats['p50_ms']:.1f} / {stats['p95_ms']:.1f} ms")
+
+        x, y = origin
+        for line in lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+            y += 20
+
+
+# Używany gdy pomiary są wyłączone - etapy to nullcontext, bez blokad i zapisu
+class NullInstrumentation(NullProfiler):
+    def record(self, name, seconds):
+        pass
+
+    def frame(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def draw_overlay(self, frame, stages=None, origin=(10, 60)):
+        pass
+
+
+# Okresowy zapis podsumowania do pliku JSON i/lub udostępnianie go lokalnie przez HTTP (GET /metrics)
+class MetricsExporter:
+    def __init__(self, instrumentation, path=None, port=None, interval=5.0):
+        self.instrumentation = instrumentation
+        self.path = path
+        self.port = port
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        if self.path:
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+            threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+            print(f"Metrics available at http://127.0.0.1:{self._server.server_port}/metrics")
+        return self
+
+    def _handler(self):
+        instrumentation = self.instrumentation
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = json.dumps(instrumentation.summary()).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        # Zapis do pliku tymczasowego i podmiana - czytelnik nigdy nie zobaczy połowy pliku
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.instrumentation.summary(), file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,25 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+INDEX_FINGER_TIP = 8
+
+
+# Wszystkie wykryte dłonie naraz jako tablica (N, 21, 2) w pikselach, bez zaokrąglania do int
+def extract_hands(result, width, height, out=None):
+    hands = result.multi_hand_landmarks or []
+    count = len(hands)
+    if out is None or out.shape[0] < count:
+        out = np.empty((max(count, 1), NUM_LANDMARKS, 2), dtype=np.float32)
+
+    points = out[:count]
+    for idx, hand_landmarks in enumerate(hands):
+        points[idx] = np.fromiter((value for lm in hand_landmarks.landmark for value in (lm.x, lm.y)),
+                                  dtype=np.float32, count=NUM_LANDMARKS * 2).reshape(NUM_LANDMARKS, 2)
+    points *= np.array([width, height], dtype=np.float32)
+    return points
+
+
+# Odejmuje średnie x i y każdej próbki, dla jednej próbki (42,) lub całego zbioru (N, 42) / (N, 21, 2)
+def normalize_batch(landmarks):
+    points = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 2)
+    return (points - points.mean(axis=1, keepdims=True)).reshape(-1, NUM_LANDMARKS * 2)
@@ -1,6 +1,60 @@
-from hand_tracking import hand_tracker
-from hand_tracking import hand_tracker_img
-from hand_tracking import hand_recognition
+import argparse
+
+from startup_profile import StartupProfiler, NullProfiler
 
 if __name__ == "__main__":
-    hand_recognition(640, 360)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="report import and init time of each startup stage")
+    parser.add_argument('--backend', choices=['numpy', 'keras', 'tflite', 'tflite-int8'], default='numpy')
+    parser.add_argument('--source', default='0',
+                        help="camera number, video file or image folder to read frames from")
+    parser.add_argument('--max-hands', type=int, default=1,
+                        help="hands to detect; gestures are taken from one controller hand")
+    parser.add_argument('--controller-hand', choices=['Left', 'Right'],
+                        help="prefer this hand (MediaPipe handedness) as the controller")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="run hand detection in this many processes, frames passed through shared memory")
+    parser.add_argument('--no-roi', action='store_true',
+                        help="run hand detection on every full frame instead of a crop around the tracked hand")
+    parser.add_argument('--idle-after', type=int, default=30,
+                        help="frames without a hand before processing slows down")
+    parser.add_argument('--idle-fps', type=float, default=4.0,
+                        help="processing rate while idle; also bounds the wake-up latency")
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help="while idle, skip detection when the mean frame difference is below this value")
+    parser.add_argument('--no-idle', action='store_true', help="always process frames at full camera rate")
+    parser.add_argument('--metrics', action='store_true', help="record per-stage timings of the recognition loop")
+    parser.add_argument('--overlay', action='store_true', help="show FPS and stage latencies on the preview window")
+    parser.add_argument('--metrics-file', help="periodically write the stage timings to this JSON file")
+    parser.add_argument('--metrics-port', type=int, help="serve the stage timings at http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+
+    profiler = StartupProfiler() if args.profile_startup else NullProfiler()
+
+    with profiler.stage('import hand_tracking'):
+        from hand_tracking import hand_recognition
+        from frame_governor import FrameRateGovernor, NullGovernor
+        from instrumentation import Instrumentation, NullInstrumentation, MetricsExporter
+
+    if args.no_idle:
+        governor = NullGovernor()
+    else:
+        governor = FrameRateGovernor(args.idle_after, args.idle_fps, args.motion_threshold)
+
+    exporter = None
+    if args.metrics or args.overlay or args.metrics_file or args.metrics_port is not None:
+        instrumentation = Instrumentation()
+        if args.metrics_file or args.metrics_port is not None:
+            exporter = MetricsExporter(instrumentation, args.metrics_file, args.metrics_port).start()
+    else:
+        instrumentation = NullInstrumentation()
+
+    try:
+        hand_recognition(640, 360, backend=args.backend, profiler=profiler, use_roi=not args.no_roi,
+                         governor=governor, instrumentation=instrumentation, overlay=args.overlay,
+                         source=args.source, max_hands=args.max_hands, controller_hand=args.controller_hand,
+                         workers=args.workers)
+    finally:
+        if exporter is not None:
+            exporter.stop()
@@ -0,0 +1,121 @@
+import argparse
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from model.landmark_dataset import LandmarkWriter
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(dir_path, 'landmark_data')
+OUTPUT_PATH = os.path.join(DATA_DIR, 'image_landmarks.lmk')
+CACHE_PATH = os.path.join(DATA_DIR, 'image_landmarks_cache.csv')
+
+GESTURE_FOLDERS = {
+    'gesture_open': 'OPEN',
+    'gesture_close': 'CLOSE',
+    'gesture_pointer': 'POINTER',
+}
+
+# Jedna instancja Hands na proces roboczy
+_hand = None
+
+
+def _init_worker():
+    global _hand
+    import mediapipe as mp
+
+    _hand = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1)
+
+
+def _extract(path):
+    import cv2
+    from landmark_utils import extract_hands
+
+    image = cv2.imread(path)
+    landmarks = np.zeros(42, dtype=np.float32)
+    if image is not None:
+        result = _hand.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        h, w, _ = image.shape
+        hands = extract_hands(result, w, h)
+        if len(hands):
+            landmarks[:] = hands[0].ravel()
+    return landmarks
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_images(data_dir=DATA_DIR):
+    images = []
+    for folder, label in GESTURE_FOLDERS.items():
+        folder_path = os.path.join(data_dir, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for name in sorted(os.listdir(folder_path)):
+            if name.lower().endswith(('.jpg', '.jpeg', '.png')):
+                images.append((os.path.join(folder_path, name), label))
+    return images
+
+
+def load_cache(cache_path=CACHE_PATH):
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, newline='') as file:
+            for row in csv.reader(file):
+                if len(row) == 43:
+                    cache[row[0]] = np.array(row[1:], dtype=np.float32)
+    return cache
+
+
+def build_dataset(data_dir=DATA_DIR, output_path=OUTPUT_PATH, cache_path=CACHE_PATH, workers=None):
+    start = time.perf_counter()
+    images = list_images(data_dir)
+    cache = load_cache(cache_path)
+
+    digests = [file_digest(path) for path, _ in images]
+    missing = sorted({digest: path for (path, _), digest in zip(images, digests) if digest not in cache}.items())
+
+    # Nowe lub zmienione zdjęcia - MediaPipe w puli procesów, wyniki od razu dopisywane do cache
+    if missing:
+        with open(cache_path, mode='a', newline='') as cache_file, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            cache_writer = csv.writer(cache_file)
+            futures = {pool.submit(_extract, path): digest for digest, path in missing}
+            for done, future in enumerate(as_completed(futures), start=1):
+                digest = futures[future]
+                row = np.round(future.result().astype(float), 2).tolist()
+                cache_writer.writerow([digest] + row)
+                # W pamięci te same zaokrąglone wartości co w pliku cache - wynik nie zależy od tego, skąd pochodzą
+                cache[digest] = np.array(row, dtype=np.float32)
+                if done % 100 == 0:
+                    cache_file.flush()
+                    print(f"Processed {done}/{len(missing)} images")
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    with LandmarkWriter(output_path, labels=GESTURE_FOLDERS.values()) as writer:
+        writer.write_many([label for _, label in images], [cache[digest] for digest in digests])
+
+    print(f"Images: {len(images)}, processed: {len(missing)}, cached: {len(images) - len(missing)}, "
+          f"time: {time.perf_counter() - start:.1f} s")
+    return [path for path, _ in images], output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extract landmarks from the gesture image folders")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    build_dataset(args.data_dir, args.output, args.cache, args.workers)
@@ -0,0 +1,155 @@
+import argparse
+import csv
+import json
+import os
+import struct
+
+import numpy as np
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+DATASET_PATH = os.path.join(dir_path, 'landmark_data/landmarks_data.lmk')
+CSV_DATASET_PATH = os.path.join(dir_path, 'landmark_data/landmarks_data.csv')
+
+# Nagłówek: magic, rozmiar nagłówka, rozmiar rekordu, tabela etykiet w JSON (dopełniona spacjami)
+MAGIC = b'LMKDATA1'
+HEADER_SIZE = 512
+HEADER_PREFIX = struct.Struct('<8sII')
+
+# Rekord: etykieta uint8 + 21 punktów (x, y) float32; 3 bajty wyrównania, żeby landmarks zaczynały się od offsetu 4
+RECORD = np.dtype({
+    'names': ['label', 'landmarks'],
+    'formats': ['u1', ('<f4', (42,))],
+    'offsets': [0, 4],
+    'itemsize': 172,
+})
+
+
+def _encode_header(labels):
+    table = json.dumps({'labels': list(labels)}).encode('utf-8')
+    header = HEADER_PREFIX.pack(MAGIC, HEADER_SIZE, RECORD.itemsize) + table
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Label table does not fit in the dataset header")
+    return header.ljust(HEADER_SIZE, b' ')
+
+
+def read_labels(path):
+    with open(path, 'rb') as file:
+        header = file.read(HEADER_SIZE)
+    magic, header_size, record_size = HEADER_PREFIX.unpack_from(header)
+    if magic != MAGIC or header_size != HEADER_SIZE or record_size != RECORD.itemsize:
+        raise ValueError(f"{path} is not a landmark dataset")
+    return json.loads(header[HEADER_PREFIX.size:].decode('utf-8'))['labels']
+
+
+def load(path=DATASET_PATH):
+    labels = read_labels(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+    if count == 0:
+        return np.zeros((0, 42), dtype=np.float32), np.zeros(0, dtype=np.uint8), labels
+
+    # Bez kopiowania - widoki na pliku zmapowanym w pamięci (niepełny ostatni rekord jest pomijany)
+    records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(count,))
+    return records['landmarks'], records['label'], labels
+
+
+class LandmarkWriter:
+    def __init__(self, path=DATASET_PATH, labels=()):
+        self.path = path
+        if os.path.exists(path):
+            self.labels = read_labels(path)
+            # Obcięcie niepełnego rekordu po przerwanym zapisie
+            size = os.path.getsize(path)
+            complete = HEADER_SIZE + (size - HEADER_SIZE) // RECORD.itemsize * RECORD.itemsize
+            if complete != size:
+                os.truncate(path, complete)
+        else:
+            self.labels = []
+            with open(path, 'wb') as file:
+                file.write(_encode_header(self.labels))
+        for label in labels:
+            self.label_index(label)
+        self.file = open(path, 'ab')
+
+    def label_index(self, label):
+        if label not in self.labels:
+            if len(self.labels) > 255:
+                raise ValueError("Too many labels for uint8 label column")
+            self.labels.append(label)
+            with open(self.path, 'r+b') as file:
+                file.write(_encode_header(self.labels))
+        return self.labels.index(label)
+
+    def write(self, label, landmarks):
+        record = np.zeros(1, dtype=RECORD)
+        record['label'] = self.label_index(label)
+        record['landmarks'] = np.asarray(landmarks, dtype=np.float32).reshape(1, 42)
+        self.file.write(record.tobytes())
+        self.file.flush()
+
+    def write_many(self, labels, landmarks, label_names=None):
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 42)
+        records = np.zeros(len(landmarks), dtype=RECORD)
+        if label_names is None:
+            records['label'] = [self.label_index(label) for label in labels]
+        else:
+            mapping = np.array([self.label_index(label) for label in label_names], dtype=np.uint8)
+            records['label'] = mapping[np.asarray(labels)]
+        records['landmarks'] = landmarks
+        self.file.write(records.tobytes())
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def convert_csv(csv_path=CSV_DATASET_PATH, output_path=DATASET_PATH):
+    with open(csv_path, newline='') as file:
+        rows = [row for row in csv.reader(file) if row and row[0] != 'label']
+
+    with LandmarkWriter(output_path) as writer:
+        writer.write_many([row[0] for row in rows], np.array([row[1:43] for row in rows], dtype=np.float32))
+    return len(rows)
+
+
+# Łączy zbiory z kilku stanowisk - indeksy etykiet są mapowane po nazwie
+def merge(output_path, input_paths):
+    total = 0
+    with LandmarkWriter(output_path) as writer:
+        for input_path in input_paths:
+            landmarks, labels, label_names = load(input_path)
+            writer.write_many(labels, landmarks, label_names)
+            total += len(labels)
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Binary landmark dataset tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help="convert landmarks_data.csv to the binary format")
+    convert_parser.add_argument('csv', nargs='?', default=CSV_DATASET_PATH)
+    convert_parser.add_argument('output', nargs='?', default=DATASET_PATH)
+
+    merge_parser = subparsers.add_parser('merge', help="append datasets from several stations to one file")
+    merge_parser.add_argument('output')
+    merge_parser.add_argument('inputs', nargs='+')
+
+    info_parser = subparsers.add_parser('info')
+    info_parser.add_argument('path', nargs='?', default=DATASET_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'convert':
+        print(f"Converted {convert_csv(args.csv, args.output)} samples to {args.output}")
+    elif args.command == 'merge':
+        print(f"Merged {merge(args.output, args.inputs)} samples into {args.output}")
+    else:
+        landmarks, labels, label_names = load(args.path)
+        print(f"Samples: {len(labels)}")
+        for idx, name in enumerate(label_names):
+            print(f"  {name}: {int(np.sum(labels == idx))}")
@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+KERAS_MODEL_PATH = os.path.join(dir_path, 'model_save/hand_tracking_model.keras')
+NUMPY_MODEL_PATH = os.path.join(dir_path, 'model_save/hand_tracking_model.npz')
+DATASET_PATH = os.path.join(dir_path, 'landmark_data/landmarks_data.lmk')
+
+# Kolejność klas z LabelEncoder w notatniku (alfabetycznie)
+CLASS_NAMES = ['CLOSE', 'OPEN', 'POINTER']
+
+
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def softmax(x):
+    x -= np.max(x, axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=-1, keepdims=True)
+    return x
+
+
+def linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': relu,
+    'softmax': softmax,
+    'linear': linear,
+}
+
+
+def file_digest(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def export_weights(keras_path=KERAS_MODEL_PATH, npz_path=NUMPY_MODEL_PATH):
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path)
+
+    arrays = {}
+    activations = []
+    for layer in model.layers:
+        if isinstance(layer, tf.keras.layers.Dense):
+            kernel, bias = layer.get_weights()
+            activation = layer.get_config()['activation']
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+            arrays[f'kernel_{len(activations)}'] = kernel.astype(np.float32)
+            arrays[f'bias_{len(activations)}'] = bias.astype(np.float32)
+            activations.append(activation)
+        elif isinstance(layer, tf.keras.layers.Dropout):
+            # Dropout działa tylko podczas treningu
+            continue
+        else:
+            raise ValueError(f"Unsupported layer: {layer.__class__.__name__}")
+
+    np.savez(npz_path, activations=np.array(activations), source_digest=np.array(file_digest(keras_path)), **arrays)
+    return npz_path
+
+
+# Dense + ReLU/softmax liczone w NumPy zamiast model.predict() z Kerasa
+class NumpyModel:
+    def __init__(self, layers):
+        self.layers = layers
+        self.input_size = layers[0][0].shape[0]
+
+    @classmethod
+    def load(cls, npz_path=NUMPY_MODEL_PATH, keras_path=KERAS_MODEL_PATH):
+        # Eksport tylko przy pierwszym uruchomieniu lub po zmianie modelu .keras
+        if not os.path.exists(npz_path):
+            export_weights(keras_path, npz_path)
+        elif os.path.exists(keras_path):
+            with np.load(npz_path) as data:
+                stale = str(data['source_digest']) != file_digest(keras_path)
+            if stale:
+                export_weights(keras_path, npz_path)
+
+        with np.load(npz_path) as data:
+            layers = []
+            for idx, activation in enumerate(data['activations']):
+                layers.append((data[f'kernel_{idx}'], data[f'bias_{idx}'], ACTIVATIONS[str(activation)]))
+        return cls(layers)
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, self.input_size)
+        for kernel, bias, activation in self.layers:
+            x = activation(x @ kernel + bias)
+        return x
+
+
+def load_dataset(path=DATASET_PATH):
+    if path.endswith('.csv'):
+        features = np.loadtxt(path, delimiter=',', dtype='float32', usecols=list(range(1, (21 * 2) + 1)), skiprows=1)
+        labels = np.loadtxt(path, delimiter=',', dtype='str', usecols=(0,), skiprows=1)
+        return features, labels
+
+    from model.landmark_dataset import load
+
+    features, labels, label_names = load(path)
+    return features, np.array(label_names)[labels]
+
+
+def check_parity(dataset_path=DATASET_PATH, npz_path=NUMPY_MODEL_PATH, keras_path=KERAS_MODEL_PATH, atol=1e-5):
+    import tensorflow as tf
+
+    from landmark_utils import normalize_batch
+
+    features, labels = load_dataset(dataset_path)
+    features = normalize_batch(features)
+
+    keras_model = tf.keras.models.load_model(keras_path)
+    numpy_model = NumpyModel.load(npz_path, keras_path)
+
+    keras_prediction = keras_model.predict(features, verbose=0)
+    numpy_prediction = numpy_model.predict(features)
+
+    max_diff = float(np.max(np.abs(keras_prediction - numpy_prediction)))
+    same_class = np.argmax(keras_prediction, axis=1) == np.argmax(numpy_prediction, axis=1)
+    accuracy = np.mean(np.array(CLASS_NAMES)[np.argmax(numpy_prediction, axis=1)] == labels)
+
+    print(f"Samples: {len(features)}")
+    print(f"Max abs difference: {max_diff:.3e}")
+    print(f"Argmax agreement: {np.mean(same_class) * 100:.2f}%")
+    print(f"NumPy accuracy on dataset: {accuracy * 100:.2f}%")
+
+    return max_diff <= atol and bool(np.all(same_class))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="NumPy inference backend for the landmark classifier")
+    parser.add_argument('command', choices=['export', 'check'])
+    parser.add_argument('--keras', default=KERAS_MODEL_PATH)
+    parser.add_argument('--npz', default=NUMPY_MODEL_PATH)
+    parser.add_argument('--dataset', default=DATASET_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        print(f"Saved weights to {export_weights(args.keras, args.npz)}")
+    else:
+        if not check_parity(args.dataset, args.npz, args.keras):
+            raise SystemExit("Parity check failed")
+        print("Parity check passed")
@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from model.numpy_model import CLASS_NAMES, DATASET_PATH, KERAS_MODEL_PATH, NUMPY_MODEL_PATH, load_dataset
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+TFLITE_MODEL_PATH = os.path.join(dir_path, 'model_save/hand_tracking_model.tflite')
+TFLITE_INT8_MODEL_PATH = os.path.join(dir_path, 'model_save/hand_tracking_model_int8.tflite')
+
+
+def _normalized_dataset(dataset_path):
+    from landmark_utils import normalize_batch
+
+    features, labels = load_dataset(dataset_path)
+    return normalize_batch(features), labels
+
+
+def export_tflite(keras_path=KERAS_MODEL_PATH, dataset_path=DATASET_PATH, float16_path=TFLITE_MODEL_PATH,
+                  int8_path=TFLITE_INT8_MODEL_PATH, calibration_samples=500):
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path)
+
+    # float16: wagi w połowie precyzji, obliczenia nadal we float32
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    with open(float16_path, 'wb') as file:
+        file.write(converter.convert())
+
+    # int8: pełna kwantyzacja z zakresami aktywacji wyznaczonymi na próbkach ze zbioru landmarków
+    features, _ = _normalized_dataset(dataset_path)
+    rng = np.random.default_rng(0)
+    calibration = features[rng.permutation(len(features))[:calibration_samples]]
+
+    def representative_dataset():
+        for sample in calibration:
+            yield [sample.reshape(1, -1)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    with open(int8_path, 'wb') as file:
+        file.write(converter.convert())
+
+    return float16_path, int8_path
+
+
+# Najlżejszy dostępny interpreter: LiteRT, tflite_runtime, a dopiero na końcu pełny TensorFlow
+def _interpreter_class():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+# Ten sam interfejs co NumpyModel / model Kerasa: predict(x) -> (N, 3)
+class TFLiteModel:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.input = interpreter.get_input_details()[0]
+        self.output = interpreter.get_output_details()[0]
+        self.input_size = int(self.input['shape'][-1])
+        self.batch_size = int(self.input['shape'][0])
+
+    @classmethod
+    def load(cls, path=TFLITE_MODEL_PATH):
+        interpreter = _interpreter_class()(model_path=path)
+        interpreter.allocate_tensors()
+        return cls(interpreter)
+
+    def predict(self, x, verbose=0):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, self.input_size)
+        if len(x) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input['index'], [len(x), self.input_size])
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self.batch_size = len(x)
+
+        scale, zero_point = self.input['quantization']
+        if self.input['dtype'] == np.int8:
+            x = np.clip(np.round(x / scale + zero_point), -128, 127).astype(np.int8)
+        self.interpreter.set_tensor(self.input['index'], x)
+        self.interpreter.invoke()
+
+        y = self.interpreter.get_tensor(self.output['index'])
+        scale, zero_point = self.output['quantization']
+        if self.output['dtype'] == np.int8:
+            y = (y.astype(np.float32) - zero_point) * scale
+        return y
+
+
+def _load_backend(backend):
+    if backend == 'keras':
+        import tensorflow as tf
+        return tf.keras.models.load_model(KERAS_MODEL_PATH)
+    if backend == 'numpy':
+        from model.numpy_model import NumpyModel
+        return NumpyModel.load(NUMPY_MODEL_PATH, KERAS_MODEL_PATH)
+    if backend == 'tflite':
+        return TFLiteModel.load(TFLITE_MODEL_PATH)
+    if backend == 'tflite-int8':
+        return TFLiteModel.load(TFLITE_INT8_MODEL_PATH)
+    raise ValueError(f"Unknown model backend: {backend}")
+
+
+def _rss_mb():
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+# Pomiar jednego backendu - uruchamiany w osobnym procesie, żeby pamięć nie mieszała się między backendami
+def measure(backend, dataset_path=DATASET_PATH, calls=300):
+    features, labels = _normalized_dataset(dataset_path)
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = _load_backend(backend)
+    load_time = time.perf_counter() - start
+
+    prediction = model.predict(features, verbose=0)
+    accuracy = float(np.mean(np.array(CLASS_NAMES)[np.argmax(prediction, axis=1)] == labels))
+
+    # Opóźnienie pojedynczego wywołania - tak jak w pętli kamery (jedna dłoń na klatkę)
+    sample = features[:1]
+    model.predict(sample, verbose=0)
+    latencies = []
+    for idx in range(calls):
+        sample = features[idx % len(features)].reshape(1, -1)
+        call_start = time.perf_counter()
+        model.predict(sample, verbose=0)
+        latencies.append(time.perf_counter() - call_start)
+    latencies = np.array(latencies) * 1000
+
+    interpreter = getattr(model, 'interpreter', None)
+    return {
+        'backend': backend,
+        'runtime': type(interpreter).__module__ if interpreter is not None else None,
+        'accuracy': accuracy,
+        'load_ms': load_time * 1000,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'rss_mb': _rss_mb(),
+        'rss_model_mb': _rss_mb() - rss_before if rss_before is not None else None,
+    }
+
+
+def compare(backends=('keras', 'numpy', 'tflite', 'tflite-int8'), dataset_path=DATASET_PATH):
+    root = os.path.dirname(dir_path)
+    env = {**os.environ, 'TF_CPP_MIN_LOG_LEVEL': '3'}
+    results = []
+    for backend in backends:
+        output = subprocess.run([sys.executable, '-m', 'model.tflite_model', 'measure', backend,
+                                 '--dataset', dataset_path], cwd=root, env=env, capture_output=True, text=True,
+                                check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def print_comparison(results):
+    print(f"  {'backend':<12}  {'accuracy':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'load ms':>8}  {'RSS MB':>8}")
+    for result in results:
+        print(f"  {result['backend']:<12}  {result['accuracy'] * 100:7.2f}%  {result['latency_p50_ms']:8.3f}  "
+              f"{result['latency_p95_ms']:8.3f}  {result['load_ms']:8.0f}  {result['rss_mb']:8.0f}"
+              + (f"  ({result['runtime']})" if result['runtime'] else ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="TFLite export and comparison of the landmark classifier backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="write float16 and int8 TFLite models")
+    export_parser.add_argument('--keras', default=KERAS_MODEL_PATH)
+    export_parser.add_argument('--dataset', default=DATASET_PATH, help="calibration data for int8 (.lmk or .csv)")
+
+    compare_parser = subparsers.add_parser('compare', help="accuracy, latency and memory of each backend")
+    compare_parser.add_argument('--dataset', default=DATASET_PATH)
+    compare_parser.add_argument('--output', help="write the comparison as JSON")
+
+    measure_parser = subparsers.add_parser('measure')
+    measure_parser.add_argument('backend')
+    measure_parser.add_argument('--dataset', default=DATASET_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        for path in export_tflite(args.keras, args.dataset):
+            print(f"Saved {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+    elif args.command == 'compare':
+        results = compare(dataset_path=args.dataset)
+        print_comparison(results)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(measure(args.backend, args.dataset)))
@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from landmark_utils import normalize_batch
+from model import landmark_dataset
+from model.numpy_model import CLASS_NAMES, DATASET_PATH, export_weights
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+OUTPUT_DIR = os.path.join(dir_path, 'model_save')
+RANDOM_SEED = 41
+
+
+# Model #1 z notatnika (Dense + Dropout)
+def build_model(num_classes=len(CLASS_NAMES)):
+    import tensorflow as tf
+
+    model = tf.keras.models.Sequential([
+        tf.keras.layers.Input((21 * 2, )),
+        tf.keras.layers.Dropout(0.15),
+
+        tf.keras.layers.Dense(21, activation='relu'),
+        tf.keras.layers.Dropout(0.15),
+
+        tf.keras.layers.Dense(10, activation='relu'),
+        tf.keras.layers.Dropout(0.1),
+
+        tf.keras.layers.Dense(4, activation='relu'),
+        tf.keras.layers.Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+# Ten sam podział co train_test_split(..., test_size, random_state=seed) z notatnika (algorytm ShuffleSplit),
+# bez zależności od sklearn
+def split_indexes(count, test_size, seed=RANDOM_SEED):
+    order = np.random.RandomState(seed).permutation(count)
+    test_count = int(math.ceil(count * test_size))
+    # Posortowane indeksy - odczyt z pliku zmapowanego w pamięci po kolei
+    return np.sort(order[test_count:]), np.sort(order[:test_count])
+
+
+def cache_key(dataset_path, test_size, seed):
+    stat = os.stat(dataset_path)
+    source = f'{os.path.realpath(dataset_path)}:{stat.st_size}:{stat.st_mtime_ns}:{test_size}:{seed}'
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+
+
+# Strumień (cechy, klasa) czytany z .lmk kawałkami i normalizowany wektorowo tą samą funkcją co w hand_tracking
+def make_dataset(landmarks, classes, indexes, batch_size=128, shuffle=False, cache=None, chunk_size=4096,
+                 seed=RANDOM_SEED):
+    import tensorflow as tf
+
+    def chunks():
+        for start in range(0, len(indexes), chunk_size):
+            chunk = indexes[start:start + chunk_size]
+            yield normalize_batch(landmarks[chunk]), classes[chunk]
+
+    dataset = tf.data.Dataset.from_generator(chunks, output_signature=(
+        tf.TensorSpec(shape=(None, 42), dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+    )).unbatch()
+    # Po pierwszej epoce dane idą z cache (w pamięci albo w pliku), nie z generatora
+    dataset = dataset.cache(cache) if cache else dataset.cache()
+    if shuffle:
+        dataset = dataset.shuffle(min(len(indexes), 10000), seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def train(dataset_path=DATASET_PATH, output_dir=OUTPUT_DIR, name='hand_tracking_model', epochs=1000,
+          batch_size=128, test_size=0.75, patience=20, seed=RANDOM_SEED, cache_dir=None, export=True):
+    import tensorflow as tf
+
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+
+    landmarks, labels, label_names = landmark_dataset.load(dataset_path)
+    unknown = set(label_names) - set(CLASS_NAMES)
+    if unknown:
+        raise ValueError(f"Labels not known to the classifier: {sorted(unknown)}")
+    # Indeksy z pliku -> klasy modelu (kolejność alfabetyczna jak LabelEncoder w notatniku)
+    mapping = np.array([CLASS_NAMES.index(label) for label in label_names], dtype=np.int32)
+    classes = mapping[labels]
+
+    train_indexes, test_indexes = split_indexes(len(classes), test_size, seed)
+    train_cache = test_cache = None
+    if cache_dir:
+        # TF nie sprawdza, z czego powstał gotowy cache - w nazwie pliku skrót zbioru danych i podziału
+        os.makedirs(cache_dir, exist_ok=True)
+        key = cache_key(dataset_path, test_size, seed)
+        train_cache = os.path.join(cache_dir, f'{name}_{key}_train')
+        test_cache = os.path.join(cache_dir, f'{name}_{key}_test')
+    train_data = make_dataset(landmarks, classes, train_indexes, batch_size, shuffle=True, cache=train_cache,
+                              seed=seed)
+    test_data = make_dataset(landmarks, classes, test_indexes, batch_size, cache=test_cache)
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, f'{name}.keras')
+    model = build_model()
+    history = model.fit(
+        train_data,
+        epochs=epochs,
+        validation_data=test_data,
+        # W odróżnieniu od notatnika wracają wagi z najlepszej epoki, a nie z ostatniej
+        callbacks=[tf.keras.callbacks.EarlyStopping(patience=patience, restore_best_weights=True, verbose=0)],
+        verbose=0
+    )
+    model.save(model_path)
+    train_time = time.perf_counter() - start
+
+    val_loss, val_acc = model.evaluate(test_data, verbose=0)
+    predicted = np.argmax(model.predict(normalize_batch(landmarks[test_indexes]), verbose=0), axis=1)
+    expected = classes[test_indexes]
+    confusion = np.zeros((len(CLASS_NAMES), len(CLASS_NAMES)), dtype=np.int64)
+    np.add.at(confusion, (expected, predicted), 1)
+
+    metrics = {
+        'dataset': dataset_path,
+        'samples': int(len(classes)),
+        'train_samples': int(len(train_indexes)),
+        'test_samples': int(len(test_indexes)),
+        'seed': seed,
+        'epochs': len(history.history['loss']),
+        'train_time_s': train_time,
+        'val_loss': float(val_loss),
+        'val_accuracy': float(val_acc),
+        'class_names': CLASS_NAMES,
+        'class_accuracy': {label: float(confusion[idx, idx] / confusion[idx].sum()) if confusion[idx].sum() else None
+                           for idx, label in enumerate(CLASS_NAMES)},
+        'confusion_matrix': confusion.tolist(),
+        'artifacts': {'keras': model_path},
+    }
+
+    # Artefakty dla backendów uruchomieniowych z tego samego modelu
+    if export:
+        from model.tflite_model import export_tflite
+
+        npz_path = os.path.join(output_dir, f'{name}.npz')
+        float16_path, int8_path = export_tflite(model_path, dataset_path,
+                                                os.path.join(output_dir, f'{name}.tflite'),
+                                                os.path.join(output_dir, f'{name}_int8.tflite'))
+        metrics['artifacts'].update(numpy=export_weights(model_path, npz_path), tflite=float16_path,
+                                    tflite_int8=int8_path)
+
+    metrics_path = os.path.join(output_dir, f'{name}_metrics.json')
+    with open(metrics_path, 'w') as file:
+        json.dump(metrics, file, indent=2)
+    return metrics, metrics_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the landmark classifier and export its runtime artifacts")
+    parser.add_argument('--dataset', default=DATASET_PATH, help="binary landmark dataset (.lmk)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--name', default='hand_tracking_model')
+    parser.add_argument('--epochs', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--test-size', type=float, default=0.75)
+    parser.add_argument('--patience', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--cache-dir', help="cache the normalized dataset on disk instead of in memory")
+    parser.add_argument('--no-export', action='store_true', help="skip the .npz and .tflite exports")
+    args = parser.parse_args()
+
+    metrics, metrics_path = train(args.dataset, args.output_dir, args.name, args.epochs, args.batch_size,
+                                  args.test_size, args.patience, args.seed, args.cache_dir, not args.no_export)
+    print(f"Epochs: {metrics['epochs']}, validation accuracy: {metrics['val_accuracy'] * 100:.2f}%, "
+          f"time: {metrics['train_time_s']:.1f} s")
+    for artifact, path in metrics['artifacts'].items():
+        print(f"  {artifact}: {path}")
+    print(f"  metrics: {metrics_path}")
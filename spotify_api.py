@@ -2,16 +2,21 @@ import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 import os
-import tkinter as tk
-from PIL import Image, ImageTk
-from io import BytesIO
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from spotify_cache import MetadataCache, QueryCache, DEFAULT_CACHE_DIR
+from spotify_paging import iter_offset_pages, iter_cursor_pages
+
+SEARCH_TYPES = ['artist', 'album', 'playlist', 'track']
 
 load_dotenv()
 
 
 class SpotifyAPI:
-    def __init__(self, client_id, client_secret, redirect_uri):
+    def __init__(self, client_id, client_secret, redirect_uri, playback_ttl=5.0, cache_dir=DEFAULT_CACHE_DIR,
+                 metadata_ttl=24 * 3600, search_ttl=600):
 
         self.client_id = client_id
         self.client_secret = client_secret
@@ -28,95 +33,186 @@ class SpotifyAPI:
 
         self.sp = spotipy.Spotify(auth_manager=self.sp_oauth)
 
+        self.metadata = MetadataCache(cache_dir, ttl=metadata_ttl)
+        self.searches = QueryCache(ttl=search_ttl)
+        self.page_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix='spotify-pages')
+        self._covers = None
+        self.item_fetchers = {
+            'track': self.sp.track,
+            'album': self.sp.album,
+            'artist': self.sp.artist,
+            'playlist': self.sp.playlist
+        }
+
+        # Lokalny stan odtwarzania - aktualizowany po naszych komendach i odświeżany w tle co playback_ttl
+        self.playback_ttl = playback_ttl
+        self._playback = None
+        self._playback_time = 0.0
+        self._local_update_time = 0.0
+        self._playback_lock = threading.Lock()
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = None
+
+    #   PLAYBACK STATE
+    def _store_playback(self, playback, requested_at):
+        with self._playback_lock:
+            # Odpowiedź wysłana przed naszą ostatnią komendą jest już nieaktualna
+            if requested_at < self._local_update_time:
+                return
+            self._playback = playback
+            self._playback_time = time.monotonic()
+
+    def _update_playback(self, **changes):
+        with self._playback_lock:
+            self._local_update_time = time.monotonic()
+            if self._playback is not None:
+                self._playback = {**self._playback, **changes}
+
+    def _invalidate_playback(self):
+        with self._playback_lock:
+            self._local_update_time = time.monotonic()
+            self._playback_time = 0.0
+
+    def get_playback_state(self, max_age=None):
+        if max_age is None:
+            max_age = self.playback_ttl
+        with self._playback_lock:
+            if self._playback is not None and time.monotonic() - self._playback_time <= max_age:
+                return self._playback
+        return self.get_current_song()
+
+    def start_playback_refresh(self):
+        if self._refresh_thread is None:
+            self._refresh_stop.clear()
+            self._refresh_thread = threading.Thread(target=self._refresh_playback, name='spotify-playback',
+                                                    daemon=True)
+            self._refresh_thread.start()
+
+    def stop_playback_refresh(self):
+        self._refresh_stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _refresh_playback(self):
+        while not self._refresh_stop.wait(self.playback_ttl / 2):
+            with self._playback_lock:
+                age = time.monotonic() - self._playback_time
+            if age >= self.playback_ttl / 2:
+                try:
+                    self.get_current_song()
+                except Exception as e:
+                    print(f"Playback refresh failed: {e}")
+
     #   PLAYBACK FUNCTIONS
     def play_song(self, song_uri):
         self.sp.start_playback(uris=[song_uri])
+        self._invalidate_playback()
 
     def pause_song(self):
         self.sp.pause_playback()
+        self._update_playback(is_playing=False)
 
     def resume_song(self):
         self.sp.start_playback()
+        self._update_playback(is_playing=True)
 
     def skip_song(self):
         self.sp.next_track()
+        self._invalidate_playback()
 
     def previous_song(self):
         self.sp.previous_track()
+        self._invalidate_playback()
 
     def get_current_song(self):
-        return self.sp.current_playback()
+        requested_at = time.monotonic()
+        playback = self.sp.current_playback()
+        self._store_playback(playback, requested_at)
+        return playback
+
+    def toggle_playback(self):
+        current_song = self.get_playback_state()
+        if current_song is None:
+            return
+        try:
+            self._toggle(current_song['is_playing'])
+        except spotipy.SpotifyException as e:
+            # Stan lokalny rozjechał się z odtwarzaczem (np. pauza z telefonu) - synchronizacja i ponowienie
+            if e.http_status not in (403, 404):
+                raise
+            current_song = self.get_current_song()
+            if current_song is not None:
+                self._toggle(current_song['is_playing'])
+
+    def _toggle(self, is_playing):
+        if is_playing is True:
+            self.pause_song()
+        elif is_playing is False:
+            self.resume_song()
 
     def playback_volume(self, volume):
         self.sp.volume(volume)
+        with self._playback_lock:
+            if self._playback is not None and self._playback.get('device'):
+                self._playback = {**self._playback, 'device': {**self._playback['device'], 'volume_percent': volume}}
+
+    # Głośność z zapamiętanego stanu odtwarzania - bez dodatkowego zapytania przy każdym geście
+    def change_volume(self, step):
+        current_song = self.get_playback_state()
+        if current_song is None or not current_song.get('device'):
+            return
+        volume = current_song['device'].get('volume_percent')
+        if volume is not None:
+            self.playback_volume(min(max(volume + step, 0), 100))
 
     #   ITEM FUNCTIONS
     def get_item_uri(self, type=None, item_name=None, limit=1):
-        if type == 'track' or type == 'album' or type == 'artist' or type == 'playlist':
-            results = self.sp.search(q=f'{type}:' + item_name, type=f'{type}', limit=limit)
-            if results[f'{type}s']['items']:
-                return results[f'{type}s']['items'][0]['uri']
+        if type in SEARCH_TYPES:
+            items = self.search_type(type, item_name, limit)
+            if items:
+                return items[0]['uri']
             else:
                 return None
         else:
             return None
 
-    def get_item_json(self, type=None, item_uri=None, item_name=None):
-        type_to_func = {
-            'track': self.sp.track,
-            'album': self.sp.album,
-            'artist': self.sp.artist,
-            'playlist': self.sp.playlist
-        }
+    def get_item(self, type, item_uri):
+        # Każdy obiekt pobierany najwyżej raz na TTL - kolejne wywołania idą z cache
+        return self.metadata.get(type, item_uri, self.item_fetchers[type])
 
-        if type in type_to_func:
+    def get_item_json(self, type=None, item_uri=None, item_name=None):
+        if type in self.item_fetchers:
             if item_uri is None:
                 item_uri = self.get_item_uri(type, item_name)
-            return type_to_func[type](item_uri)
+            return self.get_item(type, item_uri)
         else:
             return None
 
     def get_item_name(self, type=None, item_uri=None):
-        type_to_func = {
-            'track': self.sp.track,
-            'album': self.sp.album,
-            'artist': self.sp.artist,
-            'playlist': self.sp.playlist
-        }
-
-        if type in type_to_func:
-            return type_to_func[type](item_uri)['name']
+        if type in self.item_fetchers:
+            return self.get_item(type, item_uri)['name']
         else:
             return None
 
     def get_item_artist(self, type=None, item_uri=None):
-        type_to_func = {
-            'track': self.sp.track,
-            'album': self.sp.album,
-        }
-
-        if type in type_to_func:
-            return type_to_func[type](item_uri)['artists'][0]
+        if type == 'track' or type == 'album':
+            return self.get_item(type, item_uri)['artists'][0]
         elif type == 'playlist':
-            return self.sp.playlist(item_uri)['owner']
+            return self.get_item(type, item_uri)['owner']
         else:
             return None
 
     def get_item_features(self, type=None, item_uri=None):
-        type_to_func = {
-            'track': self.sp.track,
-            'album': self.sp.album,
-        }
-
-        if type in type_to_func:
-            return type_to_func[type](item_uri)['artists'][1:]
+        if type == 'track' or type == 'album':
+            return self.get_item(type, item_uri)['artists'][1:]
         else:
             return None
 
     def get_item_duration(self, type=None, item_uri=None):
 
         if type == 'track':
-            return self.sp.track(item_uri)['duration_ms']
+            return self.get_item(type, item_uri)['duration_ms']
         elif type == 'album':
             total_duration = 0
             for track in self.get_album_tracks(item_uri):
@@ -127,19 +223,21 @@ class SpotifyAPI:
 
     def get_item_cover(self, type=None, item_uri=None):
         if type == 'track':
-            return self.sp.track(item_uri)['album']['images'][0]['url']
-        elif type == 'album':
-            return self.sp.album(item_uri)['images'][0]['url']
-        elif type == 'artist':
-            return self.sp.artist(item_uri)['images'][0]['url']
-        elif type == 'playlist':
-            return self.sp.playlist(item_uri)['images'][0]['url']
+            return self.get_item(type, item_uri)['album']['images'][0]['url']
+        elif type in self.item_fetchers:
+            return self.get_item(type, item_uri)['images'][0]['url']
         else:
             return None
 
     #   ALBUM FUNCTIONS
     def get_album_tracks(self, album_uri):
-        return self.sp.album_tracks(album_uri)['items']
+        return list(self.iter_album_tracks(album_uri))
+
+    def iter_album_tracks(self, album_uri):
+        # Pierwsza strona utworów jest już w JSON-ie albumu z cache
+        first_page = self.get_item('album', album_uri)['tracks']
+        return iter_offset_pages(lambda limit, offset: self.sp.album_tracks(album_uri, limit=limit, offset=offset),
+                                 self.page_pool, first_page=first_page)
 
     #   ARTIST FUNCTIONS - todo: limit top tracks in function arguments
     def get_artist_top_tracks(self, artist_uri):
@@ -149,6 +247,33 @@ class SpotifyAPI:
             return None
 
     #   SEARCH FUNCTIONS
+    def search(self, query, limit=5):
+        # Jedno zapytanie o wszystkie typy naraz, wynik zapamiętany po znormalizowanym tekście
+        query = ' '.join(query.lower().split())
+        return self.searches.get((query, limit), self._search_all)
+
+    # Wyszukiwanie jednego typu z filtrem "type:" i podanym limitem, zapamiętane jak search()
+    def search_type(self, type, query, limit=1):
+        query = ' '.join(query.lower().split())
+        return self.searches.get((type, query, limit), self._search_type)
+
+    def _search_type(self, key):
+        type, query, limit = key
+        results = self.sp.search(q=f'{type}:{query}', type=type, limit=limit)
+        return [item for item in results[f'{type}s']['items'] if item is not None]
+
+    def _search_all(self, key):
+        query, limit = key
+        results = self.sp.search(q=query, type=','.join(SEARCH_TYPES), limit=limit)
+
+        ranked = {}
+        for type in SEARCH_TYPES:
+            items = [item for item in results.get(f'{type}s', {}).get('items', []) if item is not None]
+            # Dokładne dopasowanie nazwy na początek, reszta w kolejności trafności ze Spotify
+            items.sort(key=lambda item: ' '.join(item['name'].lower().split()) != query)
+            ranked[type] = items
+        return ranked
+
     def get_recently_played(self, limit):
         return self.sp.current_user_recently_played(limit=limit)
 
@@ -161,34 +286,63 @@ class SpotifyAPI:
     def get_liked_artists(self, limit):
         return self.sp.current_user_followed_artists(limit=limit)
 
+    #   LIBRARY ITERATORS - wszystkie elementy, strona po stronie, leniwie
+    def iter_recently_played(self):
+        return iter_cursor_pages(lambda: self.sp.current_user_recently_played(limit=50),
+                                 self.sp.next, self.page_pool)
+
+    def iter_liked_albums(self):
+        return iter_offset_pages(lambda limit, offset: self.sp.current_user_saved_albums(limit=limit, offset=offset),
+                                 self.page_pool)
+
+    def iter_playlists(self):
+        return iter_offset_pages(lambda limit, offset: self.sp.current_user_playlists(limit=limit, offset=offset),
+                                 self.page_pool)
+
+    def iter_liked_artists(self):
+        return iter_cursor_pages(lambda: self.sp.current_user_followed_artists(limit=50)['artists'],
+                                 lambda page: self.sp.next(page)['artists'], self.page_pool)
+
     def play_song_name(self, song_name):
-        results = self.sp.search(q='track:' + song_name, type='track', limit=1)
-        track_uri = results['tracks']['items'][0]['uri']
-        self.sp.start_playback(uris=[track_uri])
+        track_uri = self.get_item_uri('track', song_name)
+        if track_uri:
+            self.play_song(track_uri)
+        else:
+            print(f"No songs found for '{song_name}'")
 
     def play_album_name(self, album_name):
-        results = self.sp.search(q='album:' + album_name, type='album', limit=1)
-        if 'albums' in results and results['albums']['items']:
-            album_uri = results['albums']['items'][0]['uri']
+        album_uri = self.get_item_uri('album', album_name)
+        if album_uri:
             self.sp.start_playback(context_uri=album_uri)
+            self._invalidate_playback()
         else:
             print(f"No albums found for '{album_name}'")
 
     # GUI FUNCTIONS - todo: now working how i want it to
-    def get_album_tile(self, album_name):
-        album_uri = self.get_item_uri('album', album_name)
+    # tkinter, PIL i requests są importowane dopiero przy tworzeniu kafelków, okładki idą przez CoverCache
+    @property
+    def covers(self):
+        if self._covers is None:
+            from image_cache import CoverCache
+            self._covers = CoverCache()
+        return self._covers
+
+    def get_album_tile(self, album_name='', album_uri=''):
+        import tkinter as tk
+        from PIL import ImageTk
+
+        if not album_uri:
+            album_uri = self.get_item_uri('album', album_name)
         if album_uri:
             album_title = self.get_item_name('album', album_uri)
             album_cover = self.get_item_cover('album', album_uri)
+            cover = self.covers.prefetch(album_cover)
             album_artist = self.get_item_artist('album', album_uri)
             album_features = self.get_item_features('album', album_uri)
 
             window = tk.Tk()
             window.title(album_title)
-            response = requests.get(album_cover)
-            img_data = response.content
-            img = Image.open(BytesIO(img_data))
-            img_tk = ImageTk.PhotoImage(img)
+            img_tk = ImageTk.PhotoImage(cover.result())
 
             img_label = tk.Label(window, image=img_tk)
             img_label.image = img_tk
@@ -210,18 +364,20 @@ class SpotifyAPI:
 
             window.mainloop()
 
-    def get_artist_tile(self, artist_name):
-        artist_uri = self.get_item_uri('artist', artist_name)
+    def get_artist_tile(self, artist_name='', artist_uri=''):
+        import tkinter as tk
+        from PIL import ImageTk
+
+        if not artist_uri:
+            artist_uri = self.get_item_uri('artist', artist_name)
         if artist_uri:
             artist_name = self.get_item_name('artist', artist_uri)
             artist_cover = self.get_item_cover('artist', artist_uri)
+            cover = self.covers.prefetch(artist_cover)
 
             window = tk.Tk()
             window.title(artist_name)
-            response = requests.get(artist_cover)
-            img_data = response.content
-            img = Image.open(BytesIO(img_data))
-            img_tk = ImageTk.PhotoImage(img)
+            img_tk = ImageTk.PhotoImage(cover.result())
 
             img_label = tk.Label(window, image=img_tk)
             img_label.image = img_tk
@@ -242,20 +398,21 @@ class SpotifyAPI:
             window.mainloop()
 
     def get_playlist_tile(self, playlist_name='', playlist_uri=''):
+        import tkinter as tk
+        from PIL import ImageTk
+
         if not playlist_uri:
             playlist_uri = self.get_item_uri('playlist', playlist_name)
 
         if playlist_uri:
             playlist_name = self.get_item_name('playlist', playlist_uri)
             playlist_cover = self.get_item_cover('playlist', playlist_uri)
+            cover = self.covers.prefetch(playlist_cover)
             playlist_owner = self.get_item_artist('playlist', playlist_uri)
 
             window = tk.Tk()
             window.title(playlist_name)
-            response = requests.get(playlist_cover)
-            img_data = response.content
-            img = Image.open(BytesIO(img_data))
-            img_tk = ImageTk.PhotoImage(img)
+            img_tk = ImageTk.PhotoImage(cover.result())
 
             img_label = tk.Label(window, image=img_tk)
             img_label.image = img_tk
@@ -270,14 +427,25 @@ class SpotifyAPI:
             window.mainloop()
 
     def get_search_tile(self, name):
-        if self.get_item_uri('artist', name):
-            self.get_artist_tile(name)
-        elif self.get_item_uri('album', name):
-            self.get_album_tile(name)
-        elif self.get_item_uri('playlist', name):
-            self.get_playlist_tile(name)
-        else:
-            print('No search results found')
+        results = self.search(name)
+        query = ' '.join(name.lower().split())
+        tiles = [
+            ('artist', self.get_artist_tile),
+            ('album', self.get_album_tile),
+            ('playlist', self.get_playlist_tile),
+        ]
+
+        # Najpierw typ z dokładnym dopasowaniem nazwy, potem pierwszy niepusty w kolejności artist/album/playlist;
+        # kafelek dostaje URI z tego samego wyniku, bez kolejnego wyszukiwania
+        for type, tile in tiles:
+            if results[type] and ' '.join(results[type][0]['name'].lower().split()) == query:
+                tile(name, results[type][0]['uri'])
+                return
+        for type, tile in tiles:
+            if results[type]:
+                tile(name, results[type][0]['uri'])
+                return
+        print('No search results found')
     # recently_played = spotifyApi.get_recently_played(5)['items']
     # for song in recently_played:
     #     print(song['track']['name'])
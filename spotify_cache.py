@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'music-computer-vision', 'spotify')
+
+
+def directory_entries(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+
+def directory_size(directory):
+    return sum(size for _, size, _ in directory_entries(directory))
+
+
+def evict_oldest(directory, max_bytes):
+    # Usuwa najstarsze pliki aż katalog zmieści się w 3/4 limitu, zwraca nowy rozmiar
+    entries = sorted(directory_entries(directory))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes * 3 // 4:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+    return total
+
+
+# Cache obiektów Spotify (track/album/artist/playlist): LRU w pamięci + pliki JSON na dysku z TTL
+class MetadataCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=24 * 3600, memory_size=256,
+                 max_disk_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.write_errors = 0
+
+    def _path(self, type, uri):
+        name = hashlib.sha1(uri.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, type, f'{name}.json')
+
+    def _fresh(self, stored_at):
+        return time.time() - stored_at < self.ttl
+
+    def get(self, type, uri, fetch):
+        key = (type, uri)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        entry = self._read_disk(type, uri)
+        if entry is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._remember(key, entry)
+            return entry[1]
+
+        value = fetch(uri)
+        entry = (time.time(), value)
+        with self._lock:
+            self.misses += 1
+            self._remember(key, entry)
+        self._write_disk(type, uri, entry)
+        return value
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, type, uri):
+        path = self._path(type, uri)
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not self._fresh(data['stored_at']):
+            return None
+        return data['stored_at'], data['value']
+
+    def _write_disk(self, type, uri, entry):
+        path = self._path(type, uri)
+        data = json.dumps({'stored_at': entry[0], 'uri': uri, 'value': entry[1]}).encode('utf-8')
+
+        # Zapis przez plik tymczasowy, żeby inny proces nie odczytał połowy JSON-a
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Dysk pełny / tylko do odczytu - wartość z sieci i tak zostaje w pamięci
+            with self._lock:
+                self.write_errors += 1
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if self.write_errors == 1:
+                print(f"Metadata cache: cannot write to {self.cache_dir}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = directory_size(self.cache_dir)
+            else:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_bytes = evict_oldest(self.cache_dir, self.max_disk_bytes)
+
+    def invalidate(self, type, uri):
+        with self._lock:
+            self._memory.pop((type, uri), None)
+        try:
+            os.remove(self._path(type, uri))
+        except OSError:
+            pass
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'write_errors': self.write_errors,
+            'memory_items': len(self._memory),
+        }
+
+
+# Wyniki wyszukiwania zapamiętane w pamięci po znormalizowanym zapytaniu
+class QueryCache:
+    def __init__(self, ttl=600, size=128):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        value = fetch(key)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'items': len(self._entries),
+        }
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import Counter, deque
+
+from startup_profile import NullProfiler
+
+# Komendy, które można połączyć w jedną sekwencję (np. trzy przesunięcia w prawo = skip x3)
+MERGEABLE = {'SKIP', 'PREVIOUS', 'VOLUME_UP', 'VOLUME_DOWN'}
+# Pary komend, które się znoszą
+CANCELLING = {
+    ('TOGGLE', 'TOGGLE'),
+    ('PAUSE', 'RESUME'),
+    ('RESUME', 'PAUSE'),
+    ('VOLUME_UP', 'VOLUME_DOWN'),
+    ('VOLUME_DOWN', 'VOLUME_UP'),
+}
+
+
+class Command:
+    def __init__(self, name, enqueued_at):
+        self.name = name
+        self.count = 1
+        self.enqueued_at = enqueued_at
+
+
+class SpotifyCommandDispatcher:
+    def __init__(self, spotifyApi, debounce=0.3, latency_window=100, timer=None, volume_step=10):
+        self.spotifyApi = spotifyApi
+        self.debounce = debounce
+        self.timer = timer if timer is not None else NullProfiler()
+        self.handlers = {
+            'SKIP': spotifyApi.skip_song,
+            'PREVIOUS': spotifyApi.previous_song,
+            'PAUSE': spotifyApi.pause_song,
+            'RESUME': spotifyApi.resume_song,
+            'TOGGLE': spotifyApi.toggle_playback,
+            'VOLUME_UP': lambda: spotifyApi.change_volume(volume_step),
+            'VOLUME_DOWN': lambda: spotifyApi.change_volume(-volume_step),
+        }
+
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._last_submitted = {}
+        self._running = False
+        self._thread = None
+
+        self.latencies = deque(maxlen=latency_window)
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.executed = 0
+        self.merged = 0
+        self.cancelled = 0
+        self.debounced = 0
+        self.failed = 0
+        # Komendy przyjęte po debounce, przed łączeniem i znoszeniem (te zależą od tempa wątku wysyłającego)
+        self.accepted = Counter()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='spotify-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    # timestamp - czas klatki, z której pochodzi komenda; debounce liczony w tym samym czasie co progi gestów
+    def submit(self, name, timestamp=None):
+        if name not in self.handlers:
+            raise ValueError(f"Unknown command: {name}")
+
+        now = time.perf_counter()
+        if timestamp is None:
+            timestamp = now
+        with self._condition:
+            self.submitted += 1
+            # Debounce tylko dla komend, których nie da się połączyć - seria przesunięć ma dojść do łączenia
+            if name not in MERGEABLE:
+                last = self._last_submitted.get(name)
+                if last is not None and timestamp - last < self.debounce:
+                    self.debounced += 1
+                    return
+                self._last_submitted[name] = timestamp
+            self.accepted[name] += 1
+
+            if self._pending:
+                tail = self._pending[-1]
+                if tail.name == name and name in MERGEABLE:
+                    tail.count += 1
+                    self.merged += 1
+                    return
+                if tail.count == 1 and (tail.name, name) in CANCELLING:
+                    self._pending.pop()
+                    self.cancelled += 2
+                    return
+
+            self._pending.append(Command(name, now))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or not self._running)
+                if not self._pending:
+                    return
+                command = self._pending.popleft()
+
+            try:
+                for _ in range(command.count):
+                    with self.timer.stage(f'spotify {command.name}'):
+                        self.handlers[command.name]()
+                self.executed += command.count
+            except Exception as e:
+                self.failed += 1
+                print(f"Spotify command {command.name} failed: {e}")
+            self.latencies.append(time.perf_counter() - command.enqueued_at)
+
+    @property
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'submitted': self.submitted,
+            'executed': self.executed,
+            'merged': self.merged,
+            'cancelled': self.cancelled,
+            'debounced': self.debounced,
+            'failed': self.failed,
+            'latency_mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'latency_p95_ms': latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else None,
+            'latency_max_ms': latencies[-1] * 1000 if latencies else None,
+        }
+
+    def report(self):
+        print("Spotify dispatcher:")
+        for name, value in self.stats().items():
+            if isinstance(value, float):
+                value = f"{value:.1f}"
+            print(f"  {name}: {value}")
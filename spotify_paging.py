@@ -0,0 +1,41 @@
+from collections import deque
+
+
+# Strony z offsetem: znając total, kolejne strony są zlecane z wyprzedzeniem w puli wątków
+def iter_offset_pages(fetch, pool, page_size=50, prefetch=3, first_page=None):
+    page = first_page if first_page is not None else fetch(page_size, 0)
+    limit = page['limit'] or page_size
+    offsets = deque(range(page['offset'] + limit, page['total'], limit))
+    pending = deque()
+
+    try:
+        while offsets and len(pending) < prefetch:
+            pending.append(pool.submit(fetch, limit, offsets.popleft()))
+
+        yield from page['items']
+
+        while pending:
+            page = pending.popleft().result()
+            if offsets:
+                pending.append(pool.submit(fetch, limit, offsets.popleft()))
+            yield from page['items']
+    finally:
+        # Przerwana iteracja - niewysłane zapytania są anulowane
+        for future in pending:
+            future.cancel()
+
+
+# Strony z kursorem (recently played, followed artists): następna strona pobierana w tle
+def iter_cursor_pages(fetch_first, fetch_next, pool):
+    page = fetch_first()
+    pending = None
+
+    try:
+        while page is not None:
+            pending = pool.submit(fetch_next, page) if page.get('next') else None
+            yield from page['items']
+            page = pending.result() if pending is not None else None
+            pending = None
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,34 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = time.perf_counter() - self.start_time
+        width = max([len(name) for name, _ in self.stages] + [len('total')])
+
+        print("Startup profile:")
+        for name, duration in self.stages:
+            print(f"  {name:<{width}}  {duration * 1000:9.1f} ms")
+        print(f"  {'total':<{width}}  {total * 1000:9.1f} ms")
+
+
+# Używany gdy profilowanie jest wyłączone
+class NullProfiler:
+    def stage(self, name):
+        return nullcontext()
+
+    def report(self):
+        pass
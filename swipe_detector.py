@@ -0,0 +1,65 @@
+import numpy as np
+
+SWIPE_COMMANDS = {
+    'RIGHT': 'SKIP',
+    'LEFT': 'PREVIOUS',
+    'UP': 'VOLUME_UP',
+    'DOWN': 'VOLUME_DOWN',
+}
+
+
+# Przesunięcia palca wskazującego wykrywane z trajektorii w oknie czasowym, we współrzędnych znormalizowanych (0-1).
+# Prędkość i przemieszczenie liczone z czasu klatek, więc wynik nie zależy od FPS, rozdzielczości
+# ani pominiętych klatek.
+class SwipeDetector:
+    def __init__(self, window=0.4, min_displacement=0.15, min_velocity=0.6, cooldown=0.5, size=64):
+        self.window = window
+        self.min_displacement = min_displacement
+        self.min_velocity = min_velocity
+        self.cooldown = cooldown
+
+        self.timestamps = np.full(size, -np.inf, dtype=np.float64)
+        self.points = np.zeros((size, 2), dtype=np.float32)
+        self.count = 0
+        self.last_swipe = None
+
+    def reset(self):
+        self.timestamps.fill(-np.inf)
+        self.count = 0
+
+    def update(self, x, y, timestamp):
+        idx = self.count % len(self.timestamps)
+        self.timestamps[idx] = timestamp
+        self.points[idx] = x, y
+        self.count += 1
+
+        if self.last_swipe is not None and timestamp - self.last_swipe < self.cooldown:
+            return None
+
+        recent = self.timestamps >= timestamp - self.window
+        if np.count_nonzero(recent) < 2:
+            return None
+        times = self.timestamps[recent]
+        points = self.points[recent]
+        order = np.argsort(times)
+        times = times[order]
+        points = points[order]
+
+        duration = times[-1] - times[0]
+        if duration <= 0:
+            return None
+        displacement = points[-1] - points[0]
+        # Prędkość z dopasowania prostej do całego okna - odporna na pojedyncze skoki punktów
+        centered = times - times.mean()
+        velocity = centered @ (points - points.mean(axis=0)) / (centered @ centered)
+
+        axis = int(np.argmax(np.abs(displacement)))
+        if abs(displacement[axis]) < self.min_displacement or abs(velocity[axis]) < self.min_velocity \
+                or np.sign(velocity[axis]) != np.sign(displacement[axis]):
+            return None
+
+        self.last_swipe = timestamp
+        self.reset()
+        if axis == 0:
+            return 'RIGHT' if displacement[0] > 0 else 'LEFT'
+        return 'DOWN' if displacement[1] > 0 else 'UP'
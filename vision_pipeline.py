@@ -0,0 +1,189 @@
+import multiprocessing as mp
+import queue
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from landmark_utils import NUM_LANDMARKS
+
+PipelineResult = namedtuple('PipelineResult', ['seq', 'timestamp', 'frame', 'hands', 'handedness'])
+
+
+def _worker(worker_id, shm_name, shape, tasks, results, detector_options):
+    from hand_detector import HandDetector
+    from hand_tracks import extract_handedness
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    detector = HandDetector(**detector_options)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot = task
+            start = time.perf_counter()
+            failed = False
+            try:
+                # MediaPipe czyta klatkę bezpośrednio z pamięci współdzielonej; z powrotem idą tylko punkty
+                hands, result = detector.process(frames[slot])
+                hands, handedness = hands.copy(), extract_handedness(result)
+            except Exception as e:
+                # Klatka bez wyniku zatrzymałaby kolejność - wraca jako klatka bez dłoni
+                print(f"Detector process {worker_id} failed on frame {seq}: {e}")
+                hands, handedness = np.empty((0, NUM_LANDMARKS, 2), dtype=np.float32), []
+                failed = True
+            results.put((seq, slot, hands, handedness, worker_id, time.perf_counter() - start, failed))
+    finally:
+        detector.close()
+        del frames
+        shm.close()
+
+
+# Wykrywanie dłoni w osobnych procesach. Klatki trafiają do pierścienia slotów w multiprocessing.shared_memory,
+# procesy robocze dostają tylko (seq, slot), a wyniki wracają w kolejności numerów klatek.
+class ProcessPipeline:
+    def __init__(self, frame_size, workers=2, slots=None, detector_options=None):
+        width, height = frame_size
+        self.workers_count = workers
+        self.slots = slots if slots is not None else workers * 2
+        self.shape = (self.slots, height, width, 3)
+
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)))
+        self.frames = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.free = list(range(self.slots))
+
+        # Kolejne klatki trafiają do różnych procesów, więc ani wycinek wokół dłoni, ani śledzenie w MediaPipe
+        # (oba zależą od poprzedniej klatki) nie mają sensu - każda klatka wykrywana od zera
+        options = {'max_num_hands': 1, 'model_complexity': 0, **(detector_options or {}), 'use_roi': False,
+                   'static_image_mode': True}
+        # spawn zamiast fork - proces główny ma już wątki kamery i Spotify
+        context = mp.get_context('spawn')
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.processes = [context.Process(target=_worker, name=f'detector-{idx}', daemon=True,
+                                          args=(idx, self.shm.name, self.shape, self.tasks, self.results, options))
+                          for idx in range(workers)]
+        for process in self.processes:
+            process.start()
+
+        self.submitted = {}
+        self.pending = {}
+        self.next_seq = 0
+        self.next_result = 0
+
+        # Zegar startuje od pierwszej klatki - uruchamianie procesów nie wlicza się do wykorzystania
+        self.started_at = None
+        self.emitted = 0
+        self.wait_time = 0.0
+        self.busy_time = [0.0] * workers
+        self.max_outstanding = 0
+        self.failed_frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Wysyła klatkę do wykrywania i zwraca wyniki, które są już gotowe w kolejności numerów klatek
+    def process(self, image, timestamp):
+        if image.shape != self.shape[1:]:
+            raise ValueError(f"Frame shape {image.shape} does not match the pipeline shape {self.shape[1:]}")
+        # Wszystkie sloty zajęte - czekamy na wynik (backpressure zamiast kolejki kopii klatek)
+        while not self.free:
+            self._collect(block=True)
+
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        slot = self.free.pop()
+        np.copyto(self.frames[slot], image)
+        # Do wyników wraca oryginalna klatka z procesu głównego, więc slot można zwolnić od razu po odpowiedzi
+        self.submitted[self.next_seq] = (timestamp, image)
+        self.tasks.put((self.next_seq, slot))
+        self.next_seq += 1
+        self.max_outstanding = max(self.max_outstanding, self.next_seq - self.next_result)
+
+        self._collect(block=False)
+        return self._ready()
+
+    # Czeka na wszystkie wysłane klatki
+    def flush(self):
+        while len(self.free) < self.slots:
+            self._collect(block=True)
+        return self._ready()
+
+    def _collect(self, block):
+        while True:
+            try:
+                if block:
+                    start = time.perf_counter()
+                    item = self.results.get(timeout=1.0)
+                    self.wait_time += time.perf_counter() - start
+                    block = False
+                else:
+                    item = self.results.get_nowait()
+            except queue.Empty:
+                # Martwy proces nie odda swojej klatki - bez tego kolejność wyników stanęłaby na zawsze
+                self._check_workers()
+                if not block:
+                    return
+                continue
+            seq, slot, hands, handedness, worker_id, busy, failed = item
+            self.pending[seq] = (hands, handedness)
+            self.free.append(slot)
+            self.busy_time[worker_id] += busy
+            self.failed_frames += failed
+
+    def _check_workers(self):
+        for process in self.processes:
+            if not process.is_alive():
+                raise RuntimeError(f"Detector process {process.name} exited with code {process.exitcode}")
+
+    def _ready(self):
+        ready = []
+        while self.next_result in self.pending:
+            seq = self.next_result
+            hands, handedness = self.pending.pop(seq)
+            timestamp, image = self.submitted.pop(seq)
+            ready.append(PipelineResult(seq, timestamp, image, hands, handedness))
+            self.next_result += 1
+        self.emitted += len(ready)
+        return ready
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+        return {
+            'workers': self.workers_count,
+            'slots': self.slots,
+            'frames': self.emitted,
+            'fps': self.emitted / elapsed if elapsed else 0.0,
+            'max_outstanding': self.max_outstanding,
+            'failed_frames': self.failed_frames,
+            'main_wait_percent': 100 * self.wait_time / elapsed if elapsed else 0.0,
+            'worker_utilization_percent': [100 * busy / elapsed if elapsed else 0.0 for busy in self.busy_time],
+        }
+
+    def report(self):
+        stats = self.stats()
+        utilization = ', '.join(f"{value:.0f}%" for value in stats['worker_utilization_percent'])
+        print(f"Detection pipeline: {stats['frames']} frames at {stats['fps']:.1f} FPS, {stats['workers']} workers "
+              f"({utilization} busy), main process waiting {stats['main_wait_percent']:.0f}% of the time")
+        if stats['failed_frames']:
+            print(f"  {stats['failed_frames']} frames failed in a detector process and were passed on without hands")
+
+    def close(self):
+        if self.shm is None:
+            return
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self.frames = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
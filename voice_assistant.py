@@ -1,20 +1,47 @@
-import speech_recognition as sr
+import argparse
+import time
 
+from voice_listener import (FixtureRecognizer, GoogleRecognizer, MicrophoneSource, OfflineRecognizer, VoiceListener,
+                            WaveFileSource)
 
-def recognize_speech():
-    recognizer = sr.Recognizer()
 
-    with sr.Microphone() as source:
-        print("Listening...")
-        audio = recognizer.listen(source)
+def print_command(command):
+    print(f"Command: {command.action} '{command.query}' ({command.latency * 1000:.0f} ms after speech ended)")
+
+
+# Nie blokuje - zwraca uruchomiony nasłuch, rozpoznane komendy idą do callbacku
+def recognize_speech(recognizer=None, source=None, callback=print_command):
+    if recognizer is None:
+        recognizer = GoogleRecognizer()
+    return VoiceListener(recognizer, source, callback=callback).start()
 
-    try:
-        print("Recognizing...")
-        text = recognizer.recognize_google(audio)
-        print(f"You said: {text}")
-    except Exception as e:
-        print("Sorry, I did not understand that.")
-        print(f"Exception: {e}")
 
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Listen for 'play song ...' / 'play album ...' voice commands")
+    parser.add_argument('--backend', choices=['google', 'offline', 'fixture'], default='google')
+    parser.add_argument('--vosk-model', help="Vosk model directory for the offline backend (default: PocketSphinx)")
+    parser.add_argument('--transcripts', help="fixture backend: text file with one transcript per phrase")
+    parser.add_argument('--wav', nargs='+', help="read 16-bit mono .wav files instead of the microphone")
+    parser.add_argument('--fast', action='store_true', help="read the .wav files faster than real time")
+    args = parser.parse_args()
 
-recognize_speech()
\ No newline at end of file
+    if args.backend == 'google':
+        recognizer = GoogleRecognizer()
+    elif args.backend == 'offline':
+        recognizer = OfflineRecognizer(args.vosk_model)
+    else:
+        recognizer = FixtureRecognizer.from_file(args.transcripts) if args.transcripts else FixtureRecognizer([])
+    source = WaveFileSource(args.wav, realtime=not args.fast) if args.wav else MicrophoneSource()
+
+    listener = recognize_speech(recognizer, source)
+    try:
+        if args.wav:
+            listener.wait()
+        else:
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+        listener.report()
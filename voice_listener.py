@@ -0,0 +1,354 @@
+import json
+import math
+import queue
+import threading
+import time
+import wave
+from collections import deque, namedtuple
+
+import numpy as np
+
+# started_at / ended_at - czas (perf_counter) odczytu pierwszego i ostatniego fragmentu z mową
+AudioPhrase = namedtuple('AudioPhrase', ['data', 'sample_rate', 'sample_width', 'started_at', 'ended_at'])
+# latency - od końca wypowiedzi do przekazania komendy
+VoiceCommand = namedtuple('VoiceCommand', ['action', 'query', 'text', 'heard_at', 'latency'])
+
+VOICE_COMMANDS = {
+    'song': 'SONG',
+    'album': 'ALBUM',
+}
+
+
+# "play song <tytuł>" / "play album <tytuł>" -> (akcja, tytuł)
+def parse_command(text):
+    words = text.lower().split()
+    if len(words) >= 3 and words[0] == 'play' and words[1] in VOICE_COMMANDS:
+        return VOICE_COMMANDS[words[1]], ' '.join(words[2:])
+    return None
+
+
+def play_command(spotifyApi, command):
+    if command.action == 'SONG':
+        spotifyApi.play_song_name(command.query)
+    elif command.action == 'ALBUM':
+        spotifyApi.play_album_name(command.query)
+
+
+# Źródła dźwięku: open() -> (częstotliwość, bajty na próbkę), read() -> fragment PCM mono albo None na końcu
+class MicrophoneSource:
+    def __init__(self, device_index=None, sample_rate=16000, chunk_size=1024):
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.microphone = None
+
+    def open(self):
+        import speech_recognition as sr
+
+        self.microphone = sr.Microphone(device_index=self.device_index, sample_rate=self.sample_rate,
+                                        chunk_size=self.chunk_size)
+        self.microphone.__enter__()
+        return self.microphone.SAMPLE_RATE, self.microphone.SAMPLE_WIDTH
+
+    def read(self):
+        return self.microphone.stream.read(self.chunk_size)
+
+    def close(self):
+        if self.microphone is not None:
+            self.microphone.__exit__(None, None, None)
+            self.microphone = None
+
+
+# Nagrania .wav (16-bit mono) odtwarzane fragmentami, z ciszą między plikami
+class WaveFileSource:
+    def __init__(self, paths, chunk_size=1024, realtime=True, silence=1.0):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.silence = silence
+        self._chunks = None
+        self._next_at = None
+
+    def open(self):
+        sample_rate = None
+        chunks = []
+        for path in self.paths:
+            with wave.open(path, 'rb') as file:
+                if file.getsampwidth() != 2 or file.getnchannels() != 1:
+                    raise ValueError(f"{path}: expected 16-bit mono audio")
+                if sample_rate is not None and file.getframerate() != sample_rate:
+                    raise ValueError(f"{path}: sample rate {file.getframerate()} differs from {sample_rate}")
+                sample_rate = file.getframerate()
+                data = file.readframes(file.getnframes())
+            data += bytes(int(self.silence * sample_rate) * 2)
+            step = self.chunk_size * 2
+            chunks.extend(data[start:start + step] for start in range(0, len(data), step))
+        self.sample_rate = sample_rate
+        self._chunks = iter(chunks)
+        return sample_rate, 2
+
+    def read(self):
+        chunk = next(self._chunks, None)
+        # W trybie realtime fragmenty przychodzą w tempie nagrania, jak z mikrofonu
+        if self.realtime and chunk is not None:
+            now = time.perf_counter()
+            self._next_at = max(self._next_at or now, now - 0.1) + len(chunk) / 2 / self.sample_rate
+            if self._next_at > now:
+                time.sleep(self._next_at - now)
+        return chunk
+
+    def close(self):
+        self._chunks = None
+
+
+# Rozpoznawanie: recognize(phrase) -> tekst albo None, gdy nic nie zrozumiano
+class GoogleRecognizer:
+    def __init__(self, language='en-US', key=None):
+        import speech_recognition as sr
+
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.language = language
+        self.key = key
+
+    def recognize(self, phrase):
+        audio = self.sr.AudioData(phrase.data, phrase.sample_rate, phrase.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio, key=self.key, language=self.language)
+        except self.sr.UnknownValueError:
+            return None
+
+
+# Lokalnie: Vosk z podanym modelem, a bez modelu PocketSphinx przez speech_recognition
+class OfflineRecognizer:
+    def __init__(self, model_path=None, language='en-US'):
+        self.language = language
+        if model_path is not None:
+            from vosk import Model
+
+            self.model = Model(model_path)
+        else:
+            import speech_recognition as sr
+
+            self.model = None
+            self.sr = sr
+            self.recognizer = sr.Recognizer()
+
+    def recognize(self, phrase):
+        if self.model is not None:
+            from vosk import KaldiRecognizer
+
+            recognizer = KaldiRecognizer(self.model, phrase.sample_rate)
+            recognizer.AcceptWaveform(phrase.data)
+            return json.loads(recognizer.FinalResult()).get('text') or None
+
+        audio = self.sr.AudioData(phrase.data, phrase.sample_rate, phrase.sample_width)
+        try:
+            return self.recognizer.recognize_sphinx(audio, language=self.language)
+        except self.sr.UnknownValueError:
+            return None
+
+
+# Zamiast rozpoznawania mowy - kolejne wypowiedzi dostają kolejne teksty z listy (testy, nagrania bez sieci)
+class FixtureRecognizer:
+    def __init__(self, transcripts, delay=0.0):
+        self.transcripts = deque(transcripts)
+        self.delay = delay
+
+    @classmethod
+    def from_file(cls, path, delay=0.0):
+        with open(path, encoding='utf-8') as file:
+            return cls([line.strip() for line in file if line.strip()], delay)
+
+    def recognize(self, phrase):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.transcripts.popleft() if self.transcripts else None
+
+
+# Nasłuch w tle: wątek czytający dźwięk dzieli go na wypowiedzi (detekcja mowy po energii fragmentów),
+# drugi wątek je rozpoznaje, więc wolne rozpoznawanie nie gubi dźwięku. Komendy trafiają do callbacku
+# albo do kolejki commands.
+class VoiceListener:
+    def __init__(self, recognizer, source=None, callback=None, energy_threshold=300, dynamic_energy=True,
+                 pause=0.8, min_phrase=0.25, max_phrase=10.0, pre_roll=0.3):
+        self.recognizer = recognizer
+        self.source = source if source is not None else MicrophoneSource()
+        self.callback = callback
+        self.energy_threshold = energy_threshold
+        self.dynamic_energy = dynamic_energy
+        self.pause = pause
+        self.min_phrase = min_phrase
+        self.max_phrase = max_phrase
+        self.pre_roll = pre_roll
+
+        self.commands = queue.Queue()
+        self._phrases = queue.Queue()
+        self._stopped = threading.Event()
+        self._listen_thread = None
+        self._recognize_thread = None
+
+        self.phrases = 0
+        self.short_phrases = 0
+        self.recognized = 0
+        self.unrecognized = 0
+        self.ignored = 0
+        self.errors = 0
+        self.failed = 0
+        self.latencies = []
+        self.recognition_times = []
+
+    def start(self):
+        self._stopped.clear()
+        self._listen_thread = threading.Thread(target=self._listen, name='voice-listener', daemon=True)
+        self._recognize_thread = threading.Thread(target=self._recognize, name='voice-recognizer', daemon=True)
+        self._recognize_thread.start()
+        self._listen_thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stopped.set()
+        self.wait(timeout)
+
+    # Czeka na koniec źródła (nagrania) i rozpoznanie wszystkich wypowiedzi
+    def wait(self, timeout=None):
+        if self._listen_thread is not None:
+            self._listen_thread.join(timeout)
+        if self._recognize_thread is not None:
+            self._recognize_thread.join(timeout)
+
+    def get(self, timeout=None):
+        try:
+            return self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _listen(self):
+        try:
+            sample_rate, sample_width = self.source.open()
+        except Exception as e:
+            print(f"Voice listener could not open the audio source: {e}")
+            self._phrases.put(None)
+            return
+
+        print("Listening...")
+        phrase = None
+        pre_roll = None
+        try:
+            while not self._stopped.is_set():
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+                now = time.perf_counter()
+                duration = len(chunk) / sample_width / sample_rate
+                if pre_roll is None:
+                    pre_roll = deque(maxlen=max(1, math.ceil(self.pre_roll / duration)))
+
+                samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+                energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+                speech = energy > self.energy_threshold
+
+                if phrase is None:
+                    if speech:
+                        phrase = list(pre_roll) + [chunk]
+                        started_at = ended_at = now
+                        voiced = duration
+                        silent = 0.0
+                        continue
+                    pre_roll.append(chunk)
+                    # Próg dopasowuje się do szumu tła, tak jak dynamic_energy_threshold w speech_recognition
+                    if self.dynamic_energy:
+                        damping = 0.15 ** duration
+                        self.energy_threshold = self.energy_threshold * damping + energy * 1.5 * (1 - damping)
+                    continue
+
+                phrase.append(chunk)
+                # Czas z długości fragmentów - nagranie czytane szybciej niż w czasie rzeczywistym dzieli się tak samo
+                if speech:
+                    ended_at = now
+                    voiced += silent + duration
+                    silent = 0.0
+                else:
+                    silent += duration
+                if silent >= self.pause or voiced + silent >= self.max_phrase:
+                    self._emit(phrase, sample_rate, sample_width, started_at, ended_at, voiced)
+                    phrase = None
+                    pre_roll.clear()
+
+            if phrase is not None:
+                self._emit(phrase, sample_rate, sample_width, started_at, ended_at, voiced)
+        finally:
+            self.source.close()
+            self._phrases.put(None)
+
+    def _emit(self, chunks, sample_rate, sample_width, started_at, ended_at, voiced):
+        # Krótkie trzaski i stuknięcia nie idą do rozpoznawania
+        if voiced < self.min_phrase:
+            self.short_phrases += 1
+            return
+        self.phrases += 1
+        self._phrases.put(AudioPhrase(b''.join(chunks), sample_rate, sample_width, started_at, ended_at))
+
+    def _recognize(self):
+        while True:
+            phrase = self._phrases.get()
+            if phrase is None:
+                break
+
+            start = time.perf_counter()
+            try:
+                text = self.recognizer.recognize(phrase)
+            except Exception as e:
+                self.errors += 1
+                print(f"Voice recognition failed: {e}")
+                continue
+            self.recognition_times.append(time.perf_counter() - start)
+
+            if not text:
+                self.unrecognized += 1
+                continue
+            self.recognized += 1
+            print(f"You said: {text}")
+            parsed = parse_command(text)
+            if parsed is None:
+                self.ignored += 1
+                print("Sorry, I did not understand that.")
+                continue
+
+            latency = time.perf_counter() - phrase.ended_at
+            self.latencies.append(latency)
+            command = VoiceCommand(parsed[0], parsed[1], text, phrase.ended_at, latency)
+            if self.callback is None:
+                self.commands.put(command)
+                continue
+            try:
+                self.callback(command)
+            except Exception as e:
+                self.failed += 1
+                print(f"Voice command {command.action} '{command.query}' failed: {e}")
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        recognition = np.array(self.recognition_times) * 1000
+        return {
+            'phrases': self.phrases,
+            'short_phrases': self.short_phrases,
+            'recognized': self.recognized,
+            'unrecognized': self.unrecognized,
+            'ignored': self.ignored,
+            'commands': len(self.latencies),
+            'errors': self.errors,
+            'failed': self.failed,
+            'energy_threshold': self.energy_threshold,
+            'recognition_mean_ms': float(recognition.mean()) if len(recognition) else None,
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'latency_p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'latency_max_ms': float(latencies.max()) if len(latencies) else None,
+        }
+
+    def report(self):
+        print("Voice listener:")
+        for name, value in self.stats().items():
+            if isinstance(value, float):
+                value = f"{value:.1f}"
+            print(f"  {name}: {value}")